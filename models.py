@@ -3,11 +3,18 @@ Pydantic models for E*TRADE MCP Server responses.
 
 These models provide structured data types for E*TRADE API responses,
 focused on read-only account and investment information.
+
+Models built from E*TRADE API responses use model_construct() to skip validation.
+The repository pre-converts the Decimal fields, but other fields are stored as
+E*TRADE sent them without a type check. Keep regular validation for anything
+that comes from users or other untrusted input.
 """
 
 from decimal import Decimal
+from functools import cached_property
+from typing import Any, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, computed_field
 
 
 class Account(BaseModel):
@@ -17,6 +24,8 @@ class Account(BaseModel):
     Use get_account_balance() for detailed financial information.
     """
 
+    model_config = ConfigDict(frozen=True)
+
     account_id: str = Field(..., description="Unique account identifier")
     account_id_key: str = Field(
         ..., description="Encrypted account identifier for API calls"
@@ -50,6 +59,8 @@ class Balance(BaseModel):
     All monetary amounts are in USD with Decimal precision.
     """
 
+    model_config = ConfigDict(frozen=True)
+
     account_id: str = Field(..., description="Account identifier")
     account_type: str = Field(..., description="Account type")
     account_description: str | None = Field(None, description="Account description")
@@ -98,6 +109,8 @@ class Position(BaseModel):
     Represents ownership of a security with current valuation.
     """
 
+    model_config = ConfigDict(frozen=True)
+
     symbol: str = Field(..., description="Security symbol (e.g., 'AAPL', 'SPY')")
     symbol_description: str = Field(
         ..., description="Human-readable security name/description"
@@ -147,18 +160,27 @@ class Portfolio(BaseModel):
     Contains all positions (holdings) in the account with current valuations.
     """
 
+    model_config = ConfigDict(frozen=True)
+
     account_id: str = Field(..., description="Account identifier")
-    positions: list[Position] = Field(
-        default_factory=list, description="List of positions in the account"
-    )
-    total_market_value: Decimal | None = Field(
-        None, description="Total market value of all positions"
+    positions: tuple[Position, ...] = Field(
+        default_factory=tuple, description="List of positions in the account"
     )
     profile_id: str = Field(..., description="Profile identifier for this account")
     profile_label: str | None = Field(
         None, description="Human-readable label for this profile"
     )
 
+    @computed_field(description="Total market value of all positions")  # type: ignore[prop-decorator]
+    @cached_property
+    def total_market_value(self) -> Decimal | None:
+        """Sum of position market values, or None when nothing has a positive value."""
+        total = sum(
+            (p.market_value for p in self.positions if p.market_value is not None),
+            Decimal("0"),
+        )
+        return total if total > 0 else None
+
 
 class Quote(BaseModel):
     """Real-time or delayed quote for a security.
@@ -166,6 +188,8 @@ class Quote(BaseModel):
     Provides current pricing and trading information.
     """
 
+    model_config = ConfigDict(frozen=True)
+
     symbol: str = Field(..., description="Security symbol")
     company_name: str | None = Field(default=None, description="Company/security name")
     security_type: str | None = Field(
@@ -222,14 +246,78 @@ class Quote(BaseModel):
 class AccountsResponse(BaseModel):
     """Response containing a list of accounts."""
 
+    model_config = ConfigDict(frozen=True)
+
     accounts: list[Account] = Field(
         default_factory=list, description="List of E*TRADE accounts"
     )
 
 
+class BalancesResponse(BaseModel):
+    """Response containing balances for several accounts."""
+
+    model_config = ConfigDict(frozen=True)
+
+    balances: list[Balance] = Field(
+        default_factory=list, description="Balance for each active account"
+    )
+
+
 class QuotesResponse(BaseModel):
     """Response containing quotes for one or more securities."""
 
+    model_config = ConfigDict(frozen=True)
+
     quotes: list[Quote] = Field(
         default_factory=list, description="List of security quotes"
     )
+
+
+# Tools that batch_execute() can call; server._BATCH_TOOLS must match this list
+BatchToolName = Literal[
+    "list_accounts",
+    "get_account_balance",
+    "get_all_account_balances",
+    "get_account_portfolio",
+    "get_quotes",
+]
+
+
+class BatchOperation(BaseModel):
+    """A single tool call to run as part of batch_execute()."""
+
+    model_config = ConfigDict(frozen=True)
+
+    tool: BatchToolName = Field(..., description="Name of the tool to call")
+    arguments: dict[str, Any] = Field(
+        default_factory=dict,
+        description="Arguments for the tool, exactly as when calling it directly",
+    )
+
+
+class BatchResult(BaseModel):
+    """Outcome of one operation in a batch_execute() call."""
+
+    model_config = ConfigDict(frozen=True)
+
+    tool: str = Field(..., description="Name of the tool that was called")
+    result: (
+        AccountsResponse
+        | BalancesResponse
+        | QuotesResponse
+        | Portfolio
+        | Balance
+        | None
+    ) = Field(None, description="Tool result, if the call succeeded")
+    error: str | None = Field(None, description="Error message, if the call failed")
+
+
+class BatchResponse(BaseModel):
+    """Response containing the results of a batch_execute() call."""
+
+    model_config = ConfigDict(frozen=True)
+
+    results: list[BatchResult] = Field(
+        default_factory=list,
+        description="One result per operation, in the order they were given",
+    )
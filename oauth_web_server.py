@@ -1,47 +1,34 @@
 """Web-based OAuth authorization flow for non-interactive environments."""
 
 import logging
-import socket
-import time
+import socketserver
 import webbrowser
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from threading import Thread
-from urllib.parse import parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Event, Thread
+from urllib.parse import parse_qsl
 
 logger = logging.getLogger(__name__)
 
-
-class OAuthWebHandler(BaseHTTPRequestHandler):
-    """Minimal HTTP handler for web-based OAuth flow."""
-
-    verification_code: str | None = None
-    authorization_url: str = ""
-
-    def log_message(self, format: str, *args: object) -> None:
-        """Suppress server logs."""
-        pass
-
-    def do_GET(self) -> None:
-        """Serve the OAuth authorization page."""
-        # fmt: off
-        html = f"""<!DOCTYPE html>
+# Pages are encoded once at import; the authorization URL is the only dynamic part.
+# fmt: off
+_AUTHORIZATION_PAGE = """<!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
     <title>E*TRADE MCP Server - Authorization</title>
     <style>
-        body {{ font-family: Arial, sans-serif; max-width: 600px; margin: 50px auto; padding: 20px; }}
-        .container {{ background: #f5f5f5; padding: 30px; border-radius: 8px; }}
-        h1 {{ color: #333; }}
-        .notice {{ background: #fff3cd; border-left: 4px solid #ff9800; padding: 12px; margin: 20px 0; font-size: 14px; }}
-        .step {{ margin: 20px 0; padding: 15px; background: white; border-radius: 4px; }}
-        .step-number {{ color: #007bff; font-weight: bold; }}
-        input[type="text"] {{ width: 100%; padding: 10px; font-size: 16px; border: 1px solid #ddd; border-radius: 4px; }}
-        button {{ background: #007bff; color: white; padding: 12px 24px; font-size: 16px; border: none; border-radius: 4px; cursor: pointer; margin-top: 10px; }}
-        button:hover {{ background: #0056b3; }}
-        a {{ color: #007bff; text-decoration: none; font-weight: bold; }}
-        a:hover {{ text-decoration: underline; }}
-        .footer {{ margin-top: 30px; padding-top: 20px; border-top: 1px solid #ddd; font-size: 12px; color: #666; }}
+        body { font-family: Arial, sans-serif; max-width: 600px; margin: 50px auto; padding: 20px; }
+        .container { background: #f5f5f5; padding: 30px; border-radius: 8px; }
+        h1 { color: #333; }
+        .notice { background: #fff3cd; border-left: 4px solid #ff9800; padding: 12px; margin: 20px 0; font-size: 14px; }
+        .step { margin: 20px 0; padding: 15px; background: white; border-radius: 4px; }
+        .step-number { color: #007bff; font-weight: bold; }
+        input[type="text"] { width: 100%; padding: 10px; font-size: 16px; border: 1px solid #ddd; border-radius: 4px; }
+        button { background: #007bff; color: white; padding: 12px 24px; font-size: 16px; border: none; border-radius: 4px; cursor: pointer; margin-top: 10px; }
+        button:hover { background: #0056b3; }
+        a { color: #007bff; text-decoration: none; font-weight: bold; }
+        a:hover { text-decoration: underline; }
+        .footer { margin-top: 30px; padding-top: 20px; border-top: 1px solid #ddd; font-size: 12px; color: #666; }
     </style>
 </head>
 <body>
@@ -50,7 +37,7 @@ class OAuthWebHandler(BaseHTTPRequestHandler):
 
         <div class="step">
             <p><span class="step-number">Step 1:</span> Click this link to authorize with E*TRADE:</p>
-            <p><a href="{self.authorization_url}" target="_blank">Open E*TRADE Authorization Page</a></p>
+            <p><a href="{authorization_url}" target="_blank">Open E*TRADE Authorization Page</a></p>
         </div>
 
         <div class="step">
@@ -77,23 +64,8 @@ class OAuthWebHandler(BaseHTTPRequestHandler):
     </div>
 </body>
 </html>"""
-        # fmt: on
-        self.send_response(200)
-        self.send_header("Content-type", "text/html")
-        self.end_headers()
-        self.wfile.write(html.encode())
 
-    def do_POST(self) -> None:
-        """Handle verification code submission."""
-        content_length = int(self.headers["Content-Length"])
-        post_data = self.rfile.read(content_length).decode()
-        params = parse_qs(post_data)
-
-        code = params.get("code", [""])[0].strip()
-        if code:
-            OAuthWebHandler.verification_code = code
-            # fmt: off
-            html = """<!DOCTYPE html>
+_SUCCESS_PAGE = """<!DOCTYPE html>
 <html>
 <head>
     <meta charset="UTF-8">
@@ -110,15 +82,103 @@ class OAuthWebHandler(BaseHTTPRequestHandler):
         <p>You can close this window and return to your application.</p>
     </div>
 </body>
-</html>"""
-            # fmt: on
-            self.send_response(200)
-            self.send_header("Content-type", "text/html")
-            self.end_headers()
-            self.wfile.write(html.encode())
+</html>""".encode()
+# fmt: on
+
+_AUTHORIZATION_PAGE_HEAD, _AUTHORIZATION_PAGE_TAIL = _AUTHORIZATION_PAGE.encode().split(
+    b"{authorization_url}"
+)
+
+# The form only submits a short verification code, so bound what we read
+_MAX_POST_BYTES = 4096
+
+
+def _frame_response(status: str, body: bytes) -> bytes:
+    """Build a complete HTTP/1.0 response, headers included, as a single payload."""
+    headers = (
+        f"HTTP/1.0 {status}\r\n"
+        "Content-type: text/html; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Connection: close\r\n"
+        "\r\n"
+    )
+    return headers.encode("latin-1") + body
+
+
+# POST responses never change, so frame them once and send each in one write
+_SUCCESS_RESPONSE = _frame_response("200 OK", _SUCCESS_PAGE)
+_BAD_REQUEST_RESPONSE = _frame_response("400 Bad Request", b"")
+
+
+class OAuthWebHandler(BaseHTTPRequestHandler):
+    """Minimal HTTP handler for web-based OAuth flow."""
+
+    verification_code: str | None = None
+    authorization_url: str = ""
+    code_received: Event = Event()
+
+    # Send headers and body without waiting on Nagle's algorithm
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: object) -> None:
+        """Suppress server logs."""
+        pass
+
+    def do_GET(self) -> None:
+        """Serve the OAuth authorization page."""
+        self._send_html(
+            200,
+            _AUTHORIZATION_PAGE_HEAD
+            + self.authorization_url.encode()
+            + _AUTHORIZATION_PAGE_TAIL,
+        )
+
+    def do_POST(self) -> None:
+        """Handle verification code submission."""
+        code = self._read_submitted_code()
+        if code:
+            OAuthWebHandler.verification_code = code
+            OAuthWebHandler.code_received.set()
+            self.wfile.write(_SUCCESS_RESPONSE)
         else:
-            self.send_response(400)
-            self.end_headers()
+            self.wfile.write(_BAD_REQUEST_RESPONSE)
+
+    def _read_submitted_code(self) -> str:
+        """Read the verification code from the form body, or "" if it is invalid."""
+        try:
+            content_length = int(self.headers.get("Content-Length") or 0)
+            length = max(0, min(content_length, _MAX_POST_BYTES))
+            post_data = self.rfile.read(length).decode("ascii", "ignore")
+            fields = parse_qsl(post_data, max_num_fields=2)
+        except ValueError:
+            return ""
+
+        return next((value.strip() for key, value in fields if key == "code"), "")
+
+    def _send_html(self, status: int, payload: bytes) -> None:
+        """Send a complete HTML response with an explicit Content-Length."""
+        self.send_response(status)
+        self.send_header("Content-type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class OAuthHTTPServer(ThreadingHTTPServer):
+    """Local HTTP server that skips the reverse-DNS lookup done by HTTPServer.
+
+    Each connection is handled on its own daemon thread. Browsers often open
+    a speculative connection and send nothing on it; that must not hold up
+    the request that actually submits the verification code.
+    """
+
+    def server_bind(self) -> None:
+        """Bind the socket without resolving a fully qualified server name."""
+        socketserver.TCPServer.server_bind(self)
+        host, port = self.server_address[:2]
+        self.server_name = str(host)
+        self.server_port = port
 
 
 def run_web_oauth_flow(authorization_url: str, timeout: int = 300) -> str:
@@ -134,42 +194,39 @@ def run_web_oauth_flow(authorization_url: str, timeout: int = 300) -> str:
     Raises:
         TimeoutError: If user doesn't complete authorization within timeout
     """
-    # Find an available port
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.bind(("", 0))
-        port = s.getsockname()[1]
-
     # Set up handler with authorization URL
     OAuthWebHandler.authorization_url = authorization_url
     OAuthWebHandler.verification_code = None
+    OAuthWebHandler.code_received = Event()
 
-    # Start server in background thread
-    with HTTPServer(("localhost", port), OAuthWebHandler) as server:
+    # Start server in background thread on a port chosen by the OS
+    with OAuthHTTPServer(("127.0.0.1", 0), OAuthWebHandler) as server:
+        port = server.server_address[1]
         server_thread = Thread(target=server.serve_forever, daemon=True)
         server_thread.start()
 
-        # Open browser to local authorization page
-        local_url = f"http://localhost:{port}"
+        # Open browser to local authorization page without blocking on the
+        # browser launcher (xdg-open and friends can take a while to return)
+        local_url = f"http://127.0.0.1:{port}"
         logger.info(f"Opening browser to {local_url} for OAuth flow")
-        webbrowser.open(local_url)
-
-        # Wait for verification code with timeout
-        start_time = time.time()
-
-        while OAuthWebHandler.verification_code is None:
-            if time.time() - start_time > timeout:
-                server.shutdown()
-                server_thread.join(timeout=1)
-                raise TimeoutError(
-                    f"OAuth authorization timed out after {timeout} seconds. "
-                    "Please try again."
-                )
-            time.sleep(0.5)
-
-        # Got the code, shut down server
+        Thread(target=webbrowser.open, args=(local_url,), daemon=True).start()
+
+        # Wait for verification code with timeout, and stop serving however
+        # the wait ends (including an interrupt) before the socket is closed
+        try:
+            received = OAuthWebHandler.code_received.wait(timeout)
+        finally:
+            server.shutdown()
+            server_thread.join(timeout=1)
+
+        if not received:
+            raise TimeoutError(
+                f"OAuth authorization timed out after {timeout} seconds. "
+                "Please try again."
+            )
+
         verification_code = OAuthWebHandler.verification_code
-        server.shutdown()
-        server_thread.join(timeout=1)
+        assert verification_code is not None
         logger.info("Received verification code via web flow")
 
     return verification_code
@@ -7,12 +7,20 @@ Handles OAuth flow and provides methods for accessing E*TRADE API endpoints.
 import json
 import logging
 import os
+import re
 import sys
+import tempfile
+import threading
+import time
 import webbrowser
+from collections.abc import Callable, Mapping
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime, timedelta
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
+from functools import cache
 from pathlib import Path
-from typing import Any
+from typing import Any, ClassVar
+from zoneinfo import ZoneInfo
 
 from requests_oauthlib import OAuth1Session
 
@@ -21,6 +29,60 @@ from oauth_web_server import run_web_oauth_flow
 
 logger = logging.getLogger(__name__)
 
+# E*TRADE access tokens expire at midnight US Eastern time
+EASTERN = ZoneInfo("America/New_York")
+
+# Numbered profile credentials, e.g. ETRADE_1_CONSUMER_KEY -> profile "1"
+PROFILE_CONSUMER_KEY = re.compile(r"ETRADE_(\d+)_CONSUMER_KEY")
+
+# (model field, E*TRADE key) pairs for the decimal fields of each response
+BALANCE_COMPUTED_DECIMAL_FIELDS = (
+    ("cash_balance", "cashBalance"),
+    ("cash_buying_power", "cashBuyingPower"),
+    ("margin_buying_power", "marginBuyingPower"),
+    ("uncleared_deposits", "unclearedDeposits"),
+    ("funds_withheld_from_purchase_power", "fundsWithheldFromPurchasePower"),
+    ("funds_withheld_from_withdrawal", "fundsWithheldFromWithdrawal"),
+)
+BALANCE_REALTIME_DECIMAL_FIELDS = (
+    ("total_account_value", "totalAccountValue"),
+    ("net_account_value", "netAccountValue"),
+)
+POSITION_DECIMAL_FIELDS = (
+    ("price_paid", "pricePaid"),
+    ("total_cost", "totalCost"),
+    ("cost_per_share", "costPerShare"),
+    ("market_value", "marketValue"),
+    ("total_gain", "totalGain"),
+    ("total_gain_pct", "totalGainPct"),
+    ("days_gain", "daysGain"),
+    ("days_gain_pct", "daysGainPct"),
+)
+QUOTE_DECIMAL_FIELDS = (
+    ("last_trade", "lastTrade"),
+    ("bid", "bid"),
+    ("ask", "ask"),
+    ("change", "change"),
+    ("change_pct", "changePct"),
+    ("high", "high"),
+    ("low", "low"),
+    ("open", "open"),
+    ("close", "previousClose"),
+    ("high_52", "high52"),
+    ("low_52", "low52"),
+    ("pe_ratio", "peRatio"),
+    ("dividend", "annualDividend"),
+    ("dividend_yield", "dividendYield"),
+    ("market_cap", "marketCap"),
+)
+
+
+@cache
+def _ensure_config_dir(config_dir: Path) -> Path:
+    """Create the config directory, at most once per path per process."""
+    config_dir.mkdir(parents=True, exist_ok=True)
+    return config_dir
+
 
 class ETradeRepository:
     """Client for E*TRADE API with OAuth 1.0 authentication."""
@@ -35,6 +97,28 @@ class ETradeRepository:
     SANDBOX_BASE_URL = "https://apisb.etrade.com"
     PRODUCTION_BASE_URL = "https://api.etrade.com"
 
+    # How long the account list is reused before fetching it again (seconds)
+    ACCOUNTS_CACHE_TTL = 300
+
+    # Seconds to reuse an identical GET response, by endpoint prefix. Balances
+    # ask for real-time values and the account list is cached by get_accounts,
+    # so only quotes are listed here.
+    RESPONSE_CACHE_TTLS: ClassVar[dict[str, float]] = {"/v1/market/quote/": 5.0}
+
+    # The quote endpoint accepts at most 25 symbols per request
+    QUOTE_BATCH_SIZE = 25
+    # Most requests made at once when fanning out (stays under requests' pool of 10)
+    MAX_CONCURRENT_REQUESTS = 8
+
+    # Parsed tokens files shared by all profiles, keyed by path:
+    # ((inode, size, mtime_ns), tokens)
+    _tokens_cache: ClassVar[
+        dict[Path, tuple[tuple[int, int, int], dict[str, Any]]]
+    ] = {}
+    # Profiles authorize independently, so saves must not interleave their
+    # read-modify-replace of the shared tokens file
+    _tokens_save_lock: ClassVar[threading.Lock] = threading.Lock()
+
     def __init__(
         self,
         consumer_key: str,
@@ -70,8 +154,16 @@ class ETradeRepository:
 
         self.session: OAuth1Session | None = None
         self._is_authorized = False
-        self._token_expires_at: datetime | None = None
+        self._token_expires_at = None
         self._last_activity: datetime | None = None
+        self._accounts: list[Account] | None = None
+        self._accounts_by_key: dict[str, Account] = {}
+        self._accounts_fetched_at = 0.0
+        # Cached GET responses by endpoint: (monotonic expiry time, response).
+        # _get runs on several worker threads at once, so only touch this
+        # while holding _responses_lock.
+        self._responses: dict[str, tuple[float, dict[str, Any]]] = {}
+        self._responses_lock = threading.Lock()
 
     @staticmethod
     def _get_config_dir() -> Path:
@@ -81,14 +173,49 @@ class ETradeRepository:
             config_dir = Path(xdg_config) / "etrade-mcp"
         else:
             config_dir = Path.home() / ".config" / "etrade-mcp"
-        config_dir.mkdir(parents=True, exist_ok=True)
-        return config_dir
+        return _ensure_config_dir(config_dir)
 
     @staticmethod
     def _get_tokens_file() -> Path:
         """Get the path to the tokens file."""
         return ETradeRepository._get_config_dir() / "tokens.json"
 
+    @classmethod
+    def _read_tokens_file(cls, tokens_file: Path) -> dict[str, Any]:
+        """Read the tokens for all profiles, reusing the last parse if unchanged.
+
+        Args:
+            tokens_file: Path to the tokens file
+
+        Returns:
+            Mapping of profile ID to token data (empty if the file doesn't exist).
+            The returned dict is shared with the cache and must not be mutated.
+        """
+        try:
+            version = cls._tokens_file_version(tokens_file)
+        except FileNotFoundError:
+            return {}
+
+        cached = cls._tokens_cache.get(tokens_file)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        with open(tokens_file) as f:
+            all_tokens: dict[str, Any] = json.load(f)
+
+        cls._tokens_cache[tokens_file] = (version, all_tokens)
+        return all_tokens
+
+    @staticmethod
+    def _tokens_file_version(tokens_file: Path) -> tuple[int, int, int]:
+        """Identify the current contents of the tokens file without reading it.
+
+        Saves replace the file, so the inode changes on every write even when
+        a coarse filesystem clock gives two writes the same mtime.
+        """
+        stat = tokens_file.stat()
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
     def _save_tokens(
         self, oauth_token: str, oauth_token_secret: str, expires_at: datetime
     ) -> None:
@@ -99,27 +226,36 @@ class ETradeRepository:
             oauth_token_secret: OAuth access token secret
             expires_at: Token expiration timestamp
         """
-        tokens_file = self._get_tokens_file()
-
-        # Load existing tokens
-        if tokens_file.exists():
-            with open(tokens_file) as f:
-                all_tokens = json.load(f)
-        else:
-            all_tokens = {}
-
-        # Update tokens for this profile
-        all_tokens[self.profile_id] = {
-            "oauth_token": oauth_token,
-            "oauth_token_secret": oauth_token_secret,
-            "expires_at": expires_at.isoformat(),
-            "environment": self.environment,
-        }
-
-        # Write tokens with secure permissions
-        tokens_file.touch(mode=0o600, exist_ok=True)
-        with open(tokens_file, "w") as f:
-            json.dump(all_tokens, f, indent=2)
+        with self._tokens_save_lock:
+            tokens_file = self._get_tokens_file()
+
+            # Copy existing tokens so the cached parse isn't changed before the write
+            all_tokens = dict(self._read_tokens_file(tokens_file))
+
+            # Update tokens for this profile
+            all_tokens[self.profile_id] = {
+                "oauth_token": oauth_token,
+                "oauth_token_secret": oauth_token_secret,
+                "expires_at": expires_at.isoformat(),
+                "environment": self.environment,
+            }
+
+            # Write to a private (0o600) temporary file and rename it into place, so
+            # readers never see a truncated or half-written tokens file
+            fd, tmp_name = tempfile.mkstemp(
+                dir=tokens_file.parent, prefix=".tokens-", suffix=".tmp"
+            )
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(all_tokens, f, indent=2)
+                # The rename keeps the inode, so this is the version of what we
+                # wrote even if another process replaces the file right after
+                version = self._tokens_file_version(Path(tmp_name))
+                os.replace(tmp_name, tokens_file)
+            except BaseException:
+                os.unlink(tmp_name)
+                raise
+            self._tokens_cache[tokens_file] = (version, all_tokens)
 
         logger.info(f"Saved tokens for profile {self.profile_id}")
 
@@ -129,13 +265,7 @@ class ETradeRepository:
         Returns:
             Tuple of (oauth_token, oauth_token_secret, expires_at) or None if not found
         """
-        tokens_file = self._get_tokens_file()
-
-        if not tokens_file.exists():
-            return None
-
-        with open(tokens_file) as f:
-            all_tokens = json.load(f)
+        all_tokens = self._read_tokens_file(self._get_tokens_file())
 
         profile_tokens = all_tokens.get(self.profile_id)
         if not profile_tokens:
@@ -172,18 +302,12 @@ class ETradeRepository:
         """
         now = datetime.now(UTC)
 
-        # Calculate midnight Eastern Time
-        # ET is UTC-5 (EST) or UTC-4 (EDT)
-        # For simplicity, we'll use a conservative approach: next midnight UTC-4
-        # This means we might renew slightly early during EST, but that's safe
-        eastern_offset = timedelta(hours=-4)
-        now_eastern = now + eastern_offset
-
-        # Next midnight Eastern
+        # Next midnight Eastern, in EST or EDT as appropriate for that date
+        now_eastern = now.astimezone(EASTERN)
         next_midnight_eastern = (now_eastern + timedelta(days=1)).replace(
             hour=0, minute=0, second=0, microsecond=0
         )
-        midnight_utc = next_midnight_eastern - eastern_offset
+        midnight_utc = next_midnight_eastern.astimezone(UTC)
 
         # 2 hour inactivity timeout
         two_hour_timeout = now + timedelta(hours=2)
@@ -191,18 +315,31 @@ class ETradeRepository:
         # Return whichever comes first
         return min(midnight_utc, two_hour_timeout)
 
-    def _is_token_expired(self) -> bool:
+    @property
+    def _token_expires_at(self) -> datetime | None:
+        """When the current access token expires, if known."""
+        return self._token_expiry
+
+    @_token_expires_at.setter
+    def _token_expires_at(self, expires_at: datetime | None) -> None:
+        self._token_expiry = expires_at
+        # Renew if within 30 minutes of expiration, worked out once per token
+        self._renew_after = (
+            None if expires_at is None else expires_at - timedelta(minutes=30)
+        )
+
+    def _is_token_expired(self, now: datetime | None = None) -> bool:
         """Check if the token is expired or will expire soon.
 
+        Args:
+            now: Current time, if the caller already has it (default: read the clock)
+
         Returns:
             True if token needs renewal
         """
-        if self._token_expires_at is None:
+        if self._renew_after is None:
             return True
-
-        # Renew if within 30 minutes of expiration
-        now = datetime.now(UTC)
-        return now >= (self._token_expires_at - timedelta(minutes=30))
+        return (now or datetime.now(UTC)) >= self._renew_after
 
     def _renew_tokens(self) -> None:
         """Renew OAuth access tokens without user interaction."""
@@ -249,7 +386,17 @@ class ETradeRepository:
            c. Prompt for verification code
            d. Exchange for access token
         4. Save tokens to disk
+
+        Calling it again while the session is authorized and its token is
+        still fresh does nothing.
         """
+        if (
+            self._is_authorized
+            and self.session is not None
+            and not self._is_token_expired()
+        ):
+            return
+
         logger.info(f"Authorizing E*TRADE session for profile {self.profile_id}")
 
         # Try to load existing tokens
@@ -276,7 +423,8 @@ class ETradeRepository:
         # No valid tokens, start interactive OAuth flow
         logger.info("Starting E*TRADE OAuth authorization flow")
 
-        # Step 1: Get request token
+        # Step 1: Get request token. The same session carries on through the
+        # access token exchange and API calls, keeping its connection warm.
         oauth = OAuth1Session(
             self.consumer_key,
             client_secret=self.consumer_secret,
@@ -290,7 +438,6 @@ class ETradeRepository:
             raise
 
         resource_owner_key = request_token_response.get("oauth_token")
-        resource_owner_secret = request_token_response.get("oauth_token_secret")
 
         logger.info("Received request token")
 
@@ -325,31 +472,23 @@ class ETradeRepository:
             )
             verification_code = self._web_oauth_flow(authorization_url)
 
-        # Step 3: Exchange verification code for access token
-        oauth = OAuth1Session(
-            self.consumer_key,
-            client_secret=self.consumer_secret,
-            resource_owner_key=resource_owner_key,
-            resource_owner_secret=resource_owner_secret,
-            verifier=verification_code,
-        )
-
+        # Step 3: Exchange verification code for access token. The session
+        # already holds the request token from step 1, and swaps it for the
+        # access token on success.
         try:
-            access_token_response = oauth.fetch_access_token(self.ACCESS_TOKEN_URL)
+            access_token_response = oauth.fetch_access_token(
+                self.ACCESS_TOKEN_URL, verifier=verification_code
+            )
         except Exception as e:
             logger.error(f"Failed to get access token: {e}")
             raise
 
-        # Store the authorized session
+        # Store the authorized session; the out-of-band callback only belongs
+        # on the request token call, so stop signing it into API requests
         oauth_token = access_token_response.get("oauth_token", "")
         oauth_token_secret = access_token_response.get("oauth_token_secret", "")
-
-        self.session = OAuth1Session(
-            self.consumer_key,
-            client_secret=self.consumer_secret,
-            resource_owner_key=oauth_token,
-            resource_owner_secret=oauth_token_secret,
-        )
+        oauth._client.client.callback_uri = None
+        self.session = oauth
 
         self._is_authorized = True
         self._token_expires_at = self._calculate_token_expiry()
@@ -385,8 +524,11 @@ class ETradeRepository:
                 "Not authorized. Call authorize() first to complete OAuth flow."
             )
 
+        # Read the clock once for both the expiry check and the activity time
+        now = datetime.now(UTC)
+
         # Check if token needs renewal
-        if self._is_token_expired():
+        if self._is_token_expired(now):
             try:
                 self._renew_tokens()
             except Exception as e:
@@ -397,7 +539,7 @@ class ETradeRepository:
                 ) from e
 
         # Update last activity time
-        self._last_activity = datetime.now(UTC)
+        self._last_activity = now
 
     def _get(
         self, endpoint: str, params: dict[str, str] | None = None
@@ -414,21 +556,63 @@ class ETradeRepository:
         self._ensure_authorized()
         assert self.session is not None
 
+        ttl = None if params else self._response_cache_ttl(endpoint)
+        if ttl is not None:
+            with self._responses_lock:
+                cached = self._responses.get(endpoint)
+            if cached is not None and time.monotonic() < cached[0]:
+                logger.debug(f"Reusing cached response for {endpoint}")
+                return cached[1]
+
         url = f"{self.base_url}{endpoint}"
         logger.debug(f"GET {url} with params {params}")
 
         response = self.session.get(url, params=params)
+        if response.status_code == 401:
+            # E*TRADE rejected our credentials, so don't keep serving data
+            # fetched with them once the session is re-authorized
+            self.invalidate_accounts_cache()
+            with self._responses_lock:
+                self._responses.clear()
         response.raise_for_status()
 
-        result: dict[str, Any] = response.json()
+        # Parse numbers straight to Decimal so amounts keep the exact digits
+        # E*TRADE sent, rather than round-tripping through float
+        result: dict[str, Any] = response.json(parse_float=Decimal)
+
+        if ttl is not None:
+            with self._responses_lock:
+                now = time.monotonic()
+                # Drop expired responses so distinct symbol lists don't pile up
+                expired = [
+                    k for k, (expiry, _) in self._responses.items() if now >= expiry
+                ]
+                for key in expired:
+                    del self._responses[key]
+                self._responses[endpoint] = (now + ttl, result)
+
         return result
 
+    def _response_cache_ttl(self, endpoint: str) -> float | None:
+        """Get how long responses from an endpoint may be reused, if at all."""
+        for prefix, ttl in self.RESPONSE_CACHE_TTLS.items():
+            if endpoint.startswith(prefix):
+                return ttl
+        return None
+
     def get_accounts(self) -> list[Account]:
         """Get list of all E*TRADE accounts.
 
+        The list is reused for ACCOUNTS_CACHE_TTL seconds; call
+        invalidate_accounts_cache() to force a fresh fetch.
+
         Returns:
             List of Account objects
         """
+        cached = self._fresh_cached_accounts()
+        if cached is not None:
+            return list(cached)
+
         logger.info("Fetching account list")
         data = self._get("/v1/accounts/list.json")
 
@@ -446,8 +630,10 @@ class ETradeRepository:
             if acct_data.get("accountStatus") == "CLOSED":
                 continue
 
+            # E*TRADE responses are trusted, so skip pydantic validation here;
+            # these fields are stored as E*TRADE sent them, unchecked
             accounts.append(
-                Account(
+                Account.model_construct(
                     account_id=acct_data.get("accountId", ""),
                     account_id_key=acct_data.get("accountIdKey", ""),
                     account_mode=acct_data.get("accountMode", ""),
@@ -463,7 +649,23 @@ class ETradeRepository:
             )
 
         logger.info(f"Found {len(accounts)} active accounts")
-        return accounts
+
+        self._accounts = accounts
+        self._accounts_by_key = {a.account_id_key: a for a in accounts}
+        self._accounts_fetched_at = time.monotonic()
+        return list(accounts)
+
+    def _fresh_cached_accounts(self) -> list[Account] | None:
+        """Return the cached account list if it is still within its TTL."""
+        if time.monotonic() - self._accounts_fetched_at < self.ACCOUNTS_CACHE_TTL:
+            return self._accounts
+        return None
+
+    def invalidate_accounts_cache(self) -> None:
+        """Discard the cached account list so the next lookup refetches it."""
+        self._accounts = None
+        self._accounts_by_key = {}
+        self._accounts_fetched_at = 0.0
 
     def get_account_balance(self, account_id_key: str) -> Balance:
         """Get detailed balance for a specific account.
@@ -477,11 +679,16 @@ class ETradeRepository:
         logger.info(f"Fetching balance for account {account_id_key}")
 
         # Note: The balance endpoint requires additional parameters based on
-        # account type. For now, we'll get the account type from the account list
-        accounts = self.get_accounts()
-        account = next(
-            (a for a in accounts if a.account_id_key == account_id_key), None
-        )
+        # account type, which we get from the (cached) account list
+        from_cache = self._fresh_cached_accounts() is not None
+        self.get_accounts()
+        account = self._accounts_by_key.get(account_id_key)
+
+        if account is None and from_cache:
+            # The account may be newer than the cached list, so check once more
+            self.invalidate_accounts_cache()
+            self.get_accounts()
+            account = self._accounts_by_key.get(account_id_key)
 
         if account is None:
             raise ValueError(f"Account not found: {account_id_key}")
@@ -499,29 +706,27 @@ class ETradeRepository:
         computed = balance_data.get("Computed", {})
         realtime_values = computed.get("RealTimeValues", {})
 
-        return Balance(
+        return Balance.model_construct(
             account_id=balance_data.get("accountId", ""),
             account_type=balance_data.get("accountType", ""),
             account_description=balance_data.get("accountDescription"),
             account_mode=balance_data.get("accountMode"),
-            cash_balance=self._extract_decimal(computed, "cashBalance"),
-            cash_buying_power=self._extract_decimal(computed, "cashBuyingPower"),
-            margin_buying_power=self._extract_decimal(computed, "marginBuyingPower"),
-            total_account_value=self._extract_decimal(
-                realtime_values, "totalAccountValue"
-            ),
-            net_account_value=self._extract_decimal(realtime_values, "netAccountValue"),
-            uncleared_deposits=self._extract_decimal(computed, "unclearedDeposits"),
-            funds_withheld_from_purchase_power=self._extract_decimal(
-                computed, "fundsWithheldFromPurchasePower"
-            ),
-            funds_withheld_from_withdrawal=self._extract_decimal(
-                computed, "fundsWithheldFromWithdrawal"
-            ),
             profile_id=self.profile_id,
             profile_label=self.profile_label,
+            **self._extract_decimals(computed, BALANCE_COMPUTED_DECIMAL_FIELDS),
+            **self._extract_decimals(realtime_values, BALANCE_REALTIME_DECIMAL_FIELDS),
         )
 
+    def get_account_balances(self) -> list[Balance]:
+        """Get detailed balances for every active account, fetched concurrently.
+
+        Returns:
+            Balance objects in the same order as get_accounts()
+        """
+        keys = [account.account_id_key for account in self.get_accounts()]
+        logger.info(f"Fetching balances for {len(keys)} accounts")
+        return self._fetch_concurrently(self.get_account_balance, keys)
+
     def get_account_portfolio(self, account_id_key: str) -> Portfolio:
         """Get portfolio (holdings) for a specific account.
 
@@ -541,8 +746,7 @@ class ETradeRepository:
         if isinstance(account_portfolios, dict):
             account_portfolios = [account_portfolios]
 
-        positions = []
-        total_market_value = Decimal("0")
+        positions: list[Position] = []
 
         for acct_portfolio in account_portfolios:
             position_data_list = acct_portfolio.get("Position", [])
@@ -551,56 +755,99 @@ class ETradeRepository:
             if isinstance(position_data_list, dict):
                 position_data_list = [position_data_list]
 
-            for pos_data in position_data_list:
-                quick = pos_data.get("Quick", {})
-
-                position = Position(
-                    symbol=pos_data.get("symbolDescription", ""),
-                    symbol_description=pos_data.get("symbolDescription", ""),
-                    type_code=pos_data.get("Product", {}).get("securityType", ""),
-                    quantity=Decimal(str(pos_data.get("quantity", 0))),
-                    price_paid=self._extract_decimal(pos_data, "pricePaid"),
-                    total_cost=self._extract_decimal(pos_data, "totalCost"),
-                    cost_per_share=self._extract_decimal(pos_data, "costPerShare"),
-                    last_trade=self._extract_decimal(quick, "lastTrade"),
-                    market_value=self._extract_decimal(pos_data, "marketValue"),
-                    total_gain=self._extract_decimal(pos_data, "totalGain"),
-                    total_gain_pct=self._extract_decimal(pos_data, "totalGainPct"),
-                    days_gain=self._extract_decimal(pos_data, "daysGain"),
-                    days_gain_pct=self._extract_decimal(pos_data, "daysGainPct"),
-                    position_type=pos_data.get("positionType"),
-                    quote_detail=pos_data.get("quoteDetail"),
-                )
-                positions.append(position)
+            positions += [
+                self._position_from_api(pos_data) for pos_data in position_data_list
+            ]
 
-                if position.market_value:
-                    total_market_value += position.market_value
-
-        return Portfolio(
+        return Portfolio.model_construct(
             account_id=account_id_key,
-            positions=positions,
-            total_market_value=total_market_value if total_market_value > 0 else None,
+            positions=tuple(positions),
             profile_id=self.profile_id,
             profile_label=self.profile_label,
         )
 
+    def _position_from_api(self, pos_data: dict[str, Any]) -> Position:
+        """Build a Position from one entry of a portfolio response."""
+        symbol = pos_data.get("symbolDescription", "")
+        # A missing quantity means no shares, but a garbled one must not pass
+        # for a zero-share holding
+        raw_quantity = pos_data.get("quantity", 0)
+        quantity = self._to_decimal(raw_quantity)
+        if quantity is None:
+            raise ValueError(
+                f"Invalid quantity for position {symbol!r}: {raw_quantity!r}"
+            )
+
+        return Position.model_construct(
+            symbol=symbol,
+            symbol_description=symbol,
+            type_code=pos_data.get("Product", {}).get("securityType", ""),
+            quantity=quantity,
+            last_trade=self._extract_decimal(pos_data.get("Quick", {}), "lastTrade"),
+            position_type=pos_data.get("positionType"),
+            quote_detail=pos_data.get("quoteDetail"),
+            **self._extract_decimals(pos_data, POSITION_DECIMAL_FIELDS),
+        )
+
     def get_quotes(self, symbols: list[str]) -> list[Quote]:
         """Get real-time or delayed quotes for securities.
 
+        Symbols beyond the API's 25-per-request limit are split into batches
+        that are fetched concurrently.
+
         Args:
-            symbols: List of symbols to get quotes for (max 25)
+            symbols: List of symbols to get quotes for
 
         Returns:
-            List of Quote objects
+            List of Quote objects, in the order E*TRADE returns them per batch
         """
-        if len(symbols) > 25:
-            raise ValueError("Maximum 25 symbols allowed per request")
-
         if not symbols:
             return []
 
         logger.info(f"Fetching quotes for {len(symbols)} symbols")
 
+        batches = [
+            symbols[i : i + self.QUOTE_BATCH_SIZE]
+            for i in range(0, len(symbols), self.QUOTE_BATCH_SIZE)
+        ]
+        return [
+            quote
+            for batch_quotes in self._fetch_concurrently(self._get_quote_batch, batches)
+            for quote in batch_quotes
+        ]
+
+    def _fetch_concurrently[T, R](
+        self, fetch: Callable[[T], R], items: list[T]
+    ) -> list[R]:
+        """Call fetch for each item on a small thread pool, keeping item order.
+
+        Args:
+            fetch: Function making one API request per item
+            items: Items to fetch
+
+        Returns:
+            Results of fetch, in the same order as items
+        """
+        if len(items) <= 1:
+            return [fetch(item) for item in items]
+
+        # Renew tokens (if needed) once up front, rather than racing to do it
+        # from every worker thread
+        self._ensure_authorized()
+
+        workers = min(len(items), self.MAX_CONCURRENT_REQUESTS)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(fetch, items))
+
+    def _get_quote_batch(self, symbols: list[str]) -> list[Quote]:
+        """Get quotes for a single request's worth of symbols.
+
+        Args:
+            symbols: Symbols to get quotes for (at most QUOTE_BATCH_SIZE)
+
+        Returns:
+            List of Quote objects
+        """
         # Join symbols with comma for API
         symbol_string = ",".join(symbols)
         endpoint = f"/v1/market/quote/{symbol_string}.json"
@@ -614,40 +861,48 @@ class ETradeRepository:
         if isinstance(quote_data_list, dict):
             quote_data_list = [quote_data_list]
 
-        quotes = []
-        for quote_data in quote_data_list:
-            product = quote_data.get("Product", {})
-            all_data = quote_data.get("All", {})
-
-            quotes.append(
-                Quote(
-                    symbol=product.get("symbol", ""),
-                    company_name=product.get("companyName"),
-                    security_type=product.get("securityType"),
-                    last_trade=self._extract_decimal(all_data, "lastTrade"),
-                    bid=self._extract_decimal(all_data, "bid"),
-                    ask=self._extract_decimal(all_data, "ask"),
-                    change=self._extract_decimal(all_data, "change"),
-                    change_pct=self._extract_decimal(all_data, "changePct"),
-                    volume=all_data.get("totalVolume"),
-                    bid_size=all_data.get("bidSize"),
-                    ask_size=all_data.get("askSize"),
-                    high=self._extract_decimal(all_data, "high"),
-                    low=self._extract_decimal(all_data, "low"),
-                    open=self._extract_decimal(all_data, "open"),
-                    close=self._extract_decimal(all_data, "previousClose"),
-                    high_52=self._extract_decimal(all_data, "high52"),
-                    low_52=self._extract_decimal(all_data, "low52"),
-                    pe_ratio=self._extract_decimal(all_data, "peRatio"),
-                    dividend=self._extract_decimal(all_data, "annualDividend"),
-                    dividend_yield=self._extract_decimal(all_data, "dividendYield"),
-                    market_cap=self._extract_decimal(all_data, "marketCap"),
-                    quote_status=all_data.get("quoteStatus"),
-                    timestamp=all_data.get("dateTime"),
-                )
-            )
+        return [self._quote_from_api(quote_data) for quote_data in quote_data_list]
+
+    def _quote_from_api(self, quote_data: dict[str, Any]) -> Quote:
+        """Build a Quote from one entry of a quote response."""
+        product = quote_data.get("Product", {})
+        all_data = quote_data.get("All", {})
+
+        return Quote.model_construct(
+            symbol=product.get("symbol", ""),
+            company_name=product.get("companyName"),
+            security_type=product.get("securityType"),
+            volume=all_data.get("totalVolume"),
+            bid_size=all_data.get("bidSize"),
+            ask_size=all_data.get("askSize"),
+            quote_status=all_data.get("quoteStatus"),
+            timestamp=all_data.get("dateTime"),
+            **self._extract_decimals(all_data, QUOTE_DECIMAL_FIELDS),
+        )
+
+    def _extract_decimals(
+        self, data: dict[str, Any], fields: tuple[tuple[str, str], ...]
+    ) -> dict[str, Any]:
+        """Extract several decimal values from a dict in one pass.
+
+        Args:
+            data: Dictionary to extract from
+            fields: (model field, key) pairs to extract
 
-        return quotes
+        Returns:
+            Mapping of model field name to its Decimal value (or None)
+        """
+        get = data.get
+        extracted: dict[str, Any] = {}
+        for field, key in fields:
+            value = get(key)
+            # Missing values and numbers already parsed to Decimal (the common
+            # case with parse_float=Decimal) need no conversion
+            if value is None or type(value) is Decimal:
+                extracted[field] = value
+            else:
+                extracted[field] = self._to_decimal(value)
+        return extracted
 
     def _extract_decimal(self, data: dict[str, Any], key: str) -> Decimal | None:
         """Extract a decimal value from a dict, handling missing or invalid values.
@@ -659,17 +914,43 @@ class ETradeRepository:
         Returns:
             Decimal value or None if not present or invalid
         """
-        value = data.get(key)
+        return self._to_decimal(data.get(key))
+
+    @staticmethod
+    def _to_decimal(value: Any) -> Decimal | None:
+        """Convert a raw JSON value to a Decimal.
+
+        Args:
+            value: Value taken from an E*TRADE response
+
+        Returns:
+            Decimal value or None if missing or invalid
+        """
         if value is None:
             return None
 
+        # Convert by JSON type rather than formatting everything through str().
+        # bool is deliberately not treated as a number.
+        if isinstance(value, Decimal):
+            return value
+        value_type = type(value)
+        if value_type is int:
+            return Decimal(value)
+        if value_type is float:
+            return Decimal(repr(value))
+        if value_type is not str:
+            return None
+
+        # Only strings get here, and Decimal() reports a bad one as InvalidOperation
         try:
-            return Decimal(str(value))
-        except (ValueError, TypeError, Exception):
+            return Decimal(value)
+        except InvalidOperation:
             return None
 
 
-def create_repository_from_env(profile_id: str = "0") -> ETradeRepository:
+def create_repository_from_env(
+    profile_id: str = "0", env: Mapping[str, str] | None = None
+) -> ETradeRepository:
     """Create an ETradeRepository from environment variables for a specific profile.
 
     Environment variables (where N is the profile_id):
@@ -685,21 +966,25 @@ def create_repository_from_env(profile_id: str = "0") -> ETradeRepository:
 
     Args:
         profile_id: Profile identifier (default: "0")
+        env: Environment variables to read from (default: os.environ)
 
     Returns:
         Configured ETradeRepository instance
     """
+    if env is None:
+        env = os.environ
+
     # Try profile-specific env vars first
-    consumer_key = os.environ.get(f"ETRADE_{profile_id}_CONSUMER_KEY")
-    consumer_secret = os.environ.get(f"ETRADE_{profile_id}_CONSUMER_SECRET")
-    environment = os.environ.get(f"ETRADE_{profile_id}_ENVIRONMENT")
-    label = os.environ.get(f"ETRADE_{profile_id}_LABEL")
+    consumer_key = env.get(f"ETRADE_{profile_id}_CONSUMER_KEY")
+    consumer_secret = env.get(f"ETRADE_{profile_id}_CONSUMER_SECRET")
+    environment = env.get(f"ETRADE_{profile_id}_ENVIRONMENT")
+    label = env.get(f"ETRADE_{profile_id}_LABEL")
 
     # Fallback to legacy env vars for profile 0
     if profile_id == "0":
-        consumer_key = consumer_key or os.environ.get("ETRADE_CONSUMER_KEY")
-        consumer_secret = consumer_secret or os.environ.get("ETRADE_CONSUMER_SECRET")
-        environment = environment or os.environ.get("ETRADE_ENVIRONMENT")
+        consumer_key = consumer_key or env.get("ETRADE_CONSUMER_KEY")
+        consumer_secret = consumer_secret or env.get("ETRADE_CONSUMER_SECRET")
+        environment = environment or env.get("ETRADE_ENVIRONMENT")
 
     # Default environment to sandbox if not set
     if not environment:
@@ -734,20 +1019,20 @@ def create_repositories_from_env() -> dict[str, ETradeRepository]:
     """
     repositories = {}
 
-    # Scan environment for all profiles
+    # Scan the environment once, keeping only E*TRADE settings
+    etrade_env = {k: v for k, v in os.environ.items() if k.startswith("ETRADE_")}
+
     profile_ids = set()
 
     # Check for legacy (profile 0) env vars
-    if os.environ.get("ETRADE_CONSUMER_KEY") or os.environ.get("ETRADE_0_CONSUMER_KEY"):
+    if etrade_env.get("ETRADE_CONSUMER_KEY") or etrade_env.get("ETRADE_0_CONSUMER_KEY"):
         profile_ids.add("0")
 
     # Scan for numbered profiles
-    for key in os.environ:
-        if key.startswith("ETRADE_") and "_CONSUMER_KEY" in key:
-            # Extract profile number: ETRADE_1_CONSUMER_KEY -> "1"
-            parts = key.split("_")
-            if len(parts) >= 3 and parts[1].isdigit():
-                profile_ids.add(parts[1])
+    for key in etrade_env:
+        match = PROFILE_CONSUMER_KEY.fullmatch(key)
+        if match:
+            profile_ids.add(match.group(1))
 
     if not profile_ids:
         raise ValueError(
@@ -757,6 +1042,6 @@ def create_repositories_from_env() -> dict[str, ETradeRepository]:
 
     # Create repository for each profile
     for profile_id in sorted(profile_ids):
-        repositories[profile_id] = create_repository_from_env(profile_id)
+        repositories[profile_id] = create_repository_from_env(profile_id, etrade_env)
 
     return repositories
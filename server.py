@@ -5,11 +5,25 @@ Provides MCP tools for accessing E*TRADE account information, balances, portfoli
 and market quotes.
 """
 
+import asyncio
 import logging
+import threading
+from collections.abc import Callable
+from typing import Annotated, Any
 
 from fastmcp import FastMCP
-
-from models import AccountsResponse, Balance, Portfolio, QuotesResponse
+from pydantic import Field, TypeAdapter
+
+from models import (
+    AccountsResponse,
+    Balance,
+    BalancesResponse,
+    BatchOperation,
+    BatchResponse,
+    BatchResult,
+    Portfolio,
+    QuotesResponse,
+)
 from repository import ETradeRepository, create_repositories_from_env
 
 logging.basicConfig(
@@ -40,11 +54,18 @@ mcp = FastMCP[None](
 
 # Module-level repository instances (one per profile)
 _repositories: dict[str, ETradeRepository] = {}
+# Tools run in worker threads, so only one of them may set up the repositories
+_repositories_lock = threading.Lock()
+# One lock per profile, so authorizing one profile never blocks another
+_authorization_locks: dict[str, threading.Lock] = {}
 
 
 def get_repository(profile_id: str = "0") -> ETradeRepository:
     """Get or create the E*TRADE repository instance for a specific profile.
 
+    Profiles are authorized lazily, the first time each one is used, so a
+    request for one profile doesn't wait on another profile's OAuth flow.
+
     Args:
         profile_id: Profile identifier (default: "0")
 
@@ -53,26 +74,39 @@ def get_repository(profile_id: str = "0") -> ETradeRepository:
     """
     global _repositories
 
-    if not _repositories:
-        # Initialize all repositories from environment
-        _repositories = create_repositories_from_env()
+    with _repositories_lock:
+        if not _repositories:
+            # Initialize all repositories from environment
+            _repositories = create_repositories_from_env()
+
+        if profile_id not in _repositories:
+            raise ValueError(
+                f"Profile {profile_id} not found. "
+                f"Available profiles: {', '.join(sorted(_repositories.keys()))}"
+            )
+
+        repo = _repositories[profile_id]
+        lock = _authorization_locks.setdefault(profile_id, threading.Lock())
+
+    with lock:
+        if not repo._is_authorized:
+            repo.authorize()
+
+    return repo
 
-        # Perform OAuth authorization for all profiles
-        for repo in _repositories.values():
-            if not repo._is_authorized:
-                repo.authorize()
 
-    if profile_id not in _repositories:
-        raise ValueError(
-            f"Profile {profile_id} not found. "
-            f"Available profiles: {', '.join(sorted(_repositories.keys()))}"
-        )
+async def _call_repository[T](profile: str, call: Callable[[ETradeRepository], T]) -> T:
+    """Run a repository call for a profile in a worker thread.
 
-    return _repositories[profile_id]
+    Repository calls block on E*TRADE's API (and the first one may wait on
+    OAuth), so running them off the event loop lets concurrent tool calls
+    overlap instead of queueing behind each other.
+    """
+    return await asyncio.to_thread(lambda: call(get_repository(profile)))
 
 
 @mcp.tool()
-def list_accounts(profile: str = "0") -> AccountsResponse:
+async def list_accounts(profile: str = "0") -> AccountsResponse:
     """List all E*TRADE accounts for a specific profile.
 
     Returns all active accounts (brokerage and bank) associated with the
@@ -96,12 +130,12 @@ def list_accounts(profile: str = "0") -> AccountsResponse:
     Returns:
         AccountsResponse with list of active accounts for this profile
     """
-    accounts = get_repository(profile).get_accounts()
-    return AccountsResponse(accounts=accounts)
+    accounts = await _call_repository(profile, lambda repo: repo.get_accounts())
+    return AccountsResponse.model_construct(accounts=accounts)
 
 
 @mcp.tool()
-def get_account_balance(account_id_key: str, profile: str = "0") -> Balance:
+async def get_account_balance(account_id_key: str, profile: str = "0") -> Balance:
     """Get detailed balance information for a specific account.
 
     Provides comprehensive balance information including:
@@ -118,11 +152,32 @@ def get_account_balance(account_id_key: str, profile: str = "0") -> Balance:
     Returns:
         Balance object with detailed account balance information
     """
-    return get_repository(profile).get_account_balance(account_id_key)
+    return await _call_repository(
+        profile, lambda repo: repo.get_account_balance(account_id_key)
+    )
+
+
+@mcp.tool()
+async def get_all_account_balances(profile: str = "0") -> BalancesResponse:
+    """Get detailed balance information for every active account in a profile.
+
+    Returns the same details as get_account_balance() for each account, with
+    the balances fetched concurrently. Use this instead of calling
+    get_account_balance() once per account when working with totals across
+    accounts, like overall cash or buying power.
+
+    Args:
+        profile: Profile identifier (default: "0")
+
+    Returns:
+        BalancesResponse with one balance per active account
+    """
+    balances = await _call_repository(profile, lambda repo: repo.get_account_balances())
+    return BalancesResponse.model_construct(balances=balances)
 
 
 @mcp.tool()
-def get_account_portfolio(account_id_key: str, profile: str = "0") -> Portfolio:
+async def get_account_portfolio(account_id_key: str, profile: str = "0") -> Portfolio:
     """Get portfolio holdings for a specific account.
 
     Returns all positions (holdings) in the account with current valuations,
@@ -144,11 +199,13 @@ def get_account_portfolio(account_id_key: str, profile: str = "0") -> Portfolio:
     Returns:
         Portfolio object with all positions and total market value
     """
-    return get_repository(profile).get_account_portfolio(account_id_key)
+    return await _call_repository(
+        profile, lambda repo: repo.get_account_portfolio(account_id_key)
+    )
 
 
 @mcp.tool()
-def get_quotes(symbols: list[str], profile: str = "0") -> QuotesResponse:
+async def get_quotes(symbols: list[str], profile: str = "0") -> QuotesResponse:
     """Get real-time or delayed quotes for one or more securities.
 
     Provides current market data for stocks, ETFs, mutual funds, and other
@@ -164,7 +221,7 @@ def get_quotes(symbols: list[str], profile: str = "0") -> QuotesResponse:
 
     Args:
         symbols: List of ticker symbols to get quotes for (e.g., ["AAPL", "SPY"])
-                Maximum 25 symbols per request
+                More than 25 symbols are fetched in concurrent batches of 25
         profile: Profile identifier to use for API access (default: "0")
 
     Returns:
@@ -173,11 +230,58 @@ def get_quotes(symbols: list[str], profile: str = "0") -> QuotesResponse:
     Example:
         get_quotes(["AAPL", "MSFT", "GOOGL"])
     """
-    if len(symbols) > 25:
-        raise ValueError("Maximum 25 symbols allowed per request")
+    quotes = await _call_repository(profile, lambda repo: repo.get_quotes(symbols))
+    return QuotesResponse.model_construct(quotes=quotes)
+
+
+# Tools batch_execute() can call, validating arguments the same way the MCP
+# server does for a direct call. Keep in step with models.BatchToolName.
+_BATCH_TOOLS: dict[str, TypeAdapter[Any]] = {
+    tool.name: TypeAdapter(tool.fn)
+    for tool in (
+        list_accounts,
+        get_account_balance,
+        get_all_account_balances,
+        get_account_portfolio,
+        get_quotes,
+    )
+}
+
 
-    quotes = get_repository(profile).get_quotes(symbols)
-    return QuotesResponse(quotes=quotes)
+@mcp.tool()
+async def batch_execute(
+    operations: list[BatchOperation],
+    max_concurrent: Annotated[int, Field(ge=1, le=16)] = 8,
+) -> BatchResponse:
+    """Run several of this server's tools in a single call.
+
+    Use this when you already know you need many lookups, such as the
+    portfolios of every account or balances across several profiles. The
+    operations run concurrently, and one failing doesn't stop the others.
+
+    Args:
+        operations: Tool calls to make, each with a tool name and its arguments
+                    (e.g., {"tool": "get_account_portfolio",
+                    "arguments": {"account_id_key": "abc123"}})
+        max_concurrent: Most operations to run at once (default: 8)
+
+    Returns:
+        BatchResponse with a result or error for each operation, in order
+    """
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def run(operation: BatchOperation) -> BatchResult:
+        async with semaphore:
+            try:
+                result = await _BATCH_TOOLS[operation.tool].validate_python(
+                    operation.arguments
+                )
+            except Exception as e:
+                return BatchResult.model_construct(tool=operation.tool, error=str(e))
+        return BatchResult.model_construct(tool=operation.tool, result=result)
+
+    results = await asyncio.gather(*(run(operation) for operation in operations))
+    return BatchResponse.model_construct(results=results)
 
 
 if __name__ == "__main__":
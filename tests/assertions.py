@@ -6,15 +6,10 @@ parsing to reduce boilerplate in test files.
 """
 
 import json
-import sys
-from pathlib import Path
 from typing import Any
 
 from mcp.types import TextContent
 
-# Add parent directory to path to import modules
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
 
 def extract_response_data(result: Any) -> dict[str, Any]:
     """Extract JSON data from MCP client response."""
@@ -95,8 +95,7 @@ def sample_portfolio(sample_position: Position) -> Portfolio:
     """Sample portfolio for testing."""
     return Portfolio(
         account_id="abc123xyz",
-        positions=[sample_position],
-        total_market_value=Decimal("1750.00"),
+        positions=(sample_position,),
         profile_id="0",
         profile_label="Test Profile",
     )
@@ -150,6 +149,7 @@ def mock_repository_context(
     mock_repo = MagicMock(spec=ETradeRepository)
     mock_repo.get_accounts.return_value = [sample_account]
     mock_repo.get_account_balance.return_value = sample_balance
+    mock_repo.get_account_balances.return_value = [sample_balance]
     mock_repo.get_account_portfolio.return_value = sample_portfolio
     mock_repo.get_quotes.return_value = [sample_quote]
     mock_repo._is_authorized = True
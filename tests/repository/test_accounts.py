@@ -1,12 +1,29 @@
 """Tests for E*TRADE repository account operations."""
 
 from decimal import Decimal
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pytest
+from requests import HTTPError
 
 from repository import ETradeRepository
 
+ACCOUNTS_RESPONSE = {
+    "AccountListResponse": {
+        "Accounts": {
+            "Account": {
+                "accountId": "12345678",
+                "accountIdKey": "abc123xyz",
+                "accountMode": "CASH",
+                "accountDesc": "My Account",
+                "accountType": "INDIVIDUAL",
+                "institutionType": "BROKERAGE",
+                "accountStatus": "ACTIVE",
+            }
+        }
+    }
+}
+
 
 def test_get_accounts(
     repository: ETradeRepository, mock_oauth_session: MagicMock
@@ -184,3 +201,158 @@ def test_get_account_balance(
     assert balance.account_id == "12345678"
     assert balance.cash_balance == Decimal("5000.00")
     assert balance.total_account_value == Decimal("25000.00")
+
+
+def test_get_accounts_reuses_cached_list(
+    repository: ETradeRepository, mock_oauth_session: MagicMock
+) -> None:
+    """Test that the account list is only fetched once within the cache TTL."""
+    mock_oauth_session.get.return_value.json.return_value = ACCOUNTS_RESPONSE
+
+    first = repository.get_accounts()
+    second = repository.get_accounts()
+
+    assert first == second
+    assert first is not second
+    mock_oauth_session.get.assert_called_once()
+
+
+def test_get_accounts_refetches_after_ttl(
+    repository: ETradeRepository, mock_oauth_session: MagicMock
+) -> None:
+    """Test that the account list is fetched again once the cache expires."""
+    mock_oauth_session.get.return_value.json.return_value = ACCOUNTS_RESPONSE
+
+    with patch("repository.time.monotonic", return_value=1000.0):
+        repository.get_accounts()
+
+    with patch(
+        "repository.time.monotonic",
+        return_value=1000.0 + ETradeRepository.ACCOUNTS_CACHE_TTL,
+    ):
+        repository.get_accounts()
+
+    assert mock_oauth_session.get.call_count == 2
+
+
+def test_invalidate_accounts_cache(
+    repository: ETradeRepository, mock_oauth_session: MagicMock
+) -> None:
+    """Test that invalidating the cache forces the next call to refetch."""
+    mock_oauth_session.get.return_value.json.return_value = ACCOUNTS_RESPONSE
+
+    repository.get_accounts()
+    repository.invalidate_accounts_cache()
+    assert repository._accounts_fetched_at == 0.0
+    repository.get_accounts()
+
+    assert mock_oauth_session.get.call_count == 2
+
+
+def test_get_account_balance_uses_cached_accounts(
+    repository: ETradeRepository, mock_oauth_session: MagicMock
+) -> None:
+    """Test that balances after list_accounts don't refetch the account list."""
+    mock_oauth_session.get.return_value.json.return_value = ACCOUNTS_RESPONSE
+    repository.get_accounts()
+
+    mock_oauth_session.get.return_value.json.return_value = {
+        "BalanceResponse": {"accountId": "12345678", "accountType": "INDIVIDUAL"}
+    }
+    repository.get_account_balance("abc123xyz")
+    repository.get_account_balance("abc123xyz")
+
+    urls = [call.args[0] for call in mock_oauth_session.get.call_args_list]
+    assert [url.endswith("/list.json") for url in urls] == [True, False, False]
+
+
+def test_get_account_balance_refetches_accounts_for_unknown_key(
+    repository: ETradeRepository, mock_oauth_session: MagicMock
+) -> None:
+    """Test that a key missing from the cached list triggers one refetch."""
+    mock_oauth_session.get.return_value.json.return_value = ACCOUNTS_RESPONSE
+    repository.get_accounts()
+
+    new_account = dict(
+        ACCOUNTS_RESPONSE["AccountListResponse"]["Accounts"]["Account"],
+        accountIdKey="new456",
+    )
+    responses = {
+        "list": {"AccountListResponse": {"Accounts": {"Account": new_account}}},
+        "balance": {"BalanceResponse": {"accountId": "12345678"}},
+    }
+
+    def mock_get(url: str, params: dict[str, str] | None = None) -> MagicMock:
+        mock_resp = MagicMock()
+        mock_resp.json.return_value = responses["balance" if params else "list"]
+        return mock_resp
+
+    mock_oauth_session.get.side_effect = mock_get
+
+    balance = repository.get_account_balance("new456")
+
+    assert balance.account_id == "12345678"
+    assert mock_oauth_session.get.call_count == 3
+
+
+def test_get_account_balances(
+    repository: ETradeRepository, mock_oauth_session: MagicMock
+) -> None:
+    """Test fetching balances for every account, in account list order."""
+    accounts = [
+        dict(
+            ACCOUNTS_RESPONSE["AccountListResponse"]["Accounts"]["Account"],
+            accountId=account_id,
+            accountIdKey=f"key{account_id}",
+        )
+        for account_id in ("111", "222", "333")
+    ]
+    accounts_response = {"AccountListResponse": {"Accounts": {"Account": accounts}}}
+
+    def mock_get(url: str, params: dict[str, str] | None = None) -> MagicMock:
+        mock_resp = MagicMock()
+        if params:
+            account_id = url.split("/v1/accounts/key")[1].split("/")[0]
+            mock_resp.json.return_value = {
+                "BalanceResponse": {
+                    "accountId": account_id,
+                    "Computed": {"cashBalance": Decimal(account_id)},
+                }
+            }
+        else:
+            mock_resp.json.return_value = accounts_response
+        return mock_resp
+
+    mock_oauth_session.get.side_effect = mock_get
+
+    balances = repository.get_account_balances()
+
+    assert [b.account_id for b in balances] == ["111", "222", "333"]
+    assert [b.cash_balance for b in balances] == [
+        Decimal("111"),
+        Decimal("222"),
+        Decimal("333"),
+    ]
+    # One account list request, then one balance request per account
+    assert mock_oauth_session.get.call_count == 4
+
+
+def test_unauthorized_response_clears_cached_accounts(
+    repository: ETradeRepository, mock_oauth_session: MagicMock
+) -> None:
+    """Test that a 401 from E*TRADE drops the cached account list."""
+    mock_oauth_session.get.return_value.json.return_value = ACCOUNTS_RESPONSE
+    repository.get_accounts()
+
+    mock_oauth_session.get.return_value.status_code = 401
+    mock_oauth_session.get.return_value.raise_for_status.side_effect = HTTPError(
+        "401 Client Error: Unauthorized"
+    )
+    with pytest.raises(HTTPError):
+        repository.get_account_portfolio("abc123xyz")
+
+    mock_oauth_session.get.return_value.status_code = 200
+    mock_oauth_session.get.return_value.raise_for_status.side_effect = None
+    repository.get_accounts()
+
+    assert mock_oauth_session.get.call_count == 3
@@ -5,6 +5,7 @@ from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
+from requests_oauthlib import OAuth1Session
 
 from repository import ETradeRepository
 
@@ -227,6 +228,40 @@ def test_authorize_with_expired_cached_tokens(temp_config_home: Path) -> None:
         assert repo._is_authorized
 
 
+def test_authorize_reuses_one_session(temp_config_home: Path) -> None:
+    """Test that one OAuth session carries the flow through to API calls."""
+    token_responses = [
+        MagicMock(status_code=200, text="oauth_token=req&oauth_token_secret=req_s"),
+        MagicMock(status_code=200, text="oauth_token=acc&oauth_token_secret=acc_s"),
+    ]
+
+    with (
+        patch.object(OAuth1Session, "post", side_effect=token_responses) as mock_post,
+        patch("builtins.input", return_value="verification_code"),
+        patch("builtins.print"),
+        patch("repository.sys.stdin.isatty", return_value=True),
+    ):
+        repo = ETradeRepository(
+            consumer_key="test_key",
+            consumer_secret="test_secret",
+            environment="sandbox",
+            auto_authorize=False,
+        )
+
+        repo.authorize()
+
+    assert [call.args[0] for call in mock_post.call_args_list] == [
+        ETradeRepository.REQUEST_TOKEN_URL,
+        ETradeRepository.ACCESS_TOKEN_URL,
+    ]
+    assert isinstance(repo.session, OAuth1Session)
+    client = repo.session._client.client
+    assert client.resource_owner_key == "acc"
+    assert client.resource_owner_secret == "acc_s"
+    assert client.verifier is None
+    assert client.callback_uri is None
+
+
 def test_web_oauth_flow_success(temp_config_home: Path) -> None:
     """Test web-based OAuth flow with successful verification."""
     with (
@@ -286,3 +321,18 @@ def test_web_oauth_flow_timeout(temp_config_home: Path) -> None:
         ):
             with pytest.raises(TimeoutError, match="OAuth authorization timed out"):
                 repo.authorize()
+
+
+def test_authorize_when_already_authorized(
+    repository: ETradeRepository, mock_oauth_session: MagicMock
+) -> None:
+    """Test that authorize() is a no-op for an authorized, unexpired session."""
+    with (
+        patch("repository.OAuth1Session") as mock_oauth,
+        patch.object(repository, "_load_tokens") as mock_load,
+    ):
+        repository.authorize()
+
+    mock_load.assert_not_called()
+    mock_oauth.assert_not_called()
+    assert repository.session is mock_oauth_session
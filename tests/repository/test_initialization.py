@@ -5,7 +5,11 @@ from unittest.mock import patch
 
 import pytest
 
-from repository import ETradeRepository, create_repository_from_env
+from repository import (
+    ETradeRepository,
+    create_repositories_from_env,
+    create_repository_from_env,
+)
 
 
 def test_repository_initialization() -> None:
@@ -61,18 +65,37 @@ def test_create_repository_from_env() -> None:
     assert repo.environment == "production"
 
 
-@patch.dict("os.environ", {}, clear=True)
-def test_create_repository_from_env_missing_key() -> None:
-    """Test creating repository fails when consumer key is missing."""
-    with pytest.raises(ValueError, match="ETRADE_0_CONSUMER_KEY"):
-        create_repository_from_env()
+@pytest.mark.parametrize(
+    ("env", "missing"),
+    [
+        ({}, "ETRADE_0_CONSUMER_KEY"),
+        ({"ETRADE_CONSUMER_KEY": "test_key"}, "ETRADE_0_CONSUMER_SECRET"),
+    ],
+    ids=["missing_key", "missing_secret"],
+)
+def test_create_repository_from_env_missing_credentials(
+    env: dict[str, str], missing: str
+) -> None:
+    """Test creating repository fails when a consumer credential is missing."""
+    with pytest.raises(ValueError, match=missing):
+        create_repository_from_env("0", env)
 
 
-@patch.dict("os.environ", {"ETRADE_CONSUMER_KEY": "test_key"}, clear=True)
-def test_create_repository_from_env_missing_secret() -> None:
-    """Test creating repository fails when consumer secret is missing."""
-    with pytest.raises(ValueError, match="ETRADE_0_CONSUMER_SECRET"):
-        create_repository_from_env()
+@patch.dict("os.environ", {}, clear=True)
+def test_create_repository_from_env_with_mapping() -> None:
+    """Test creating a repository from an explicit environment mapping."""
+    repo = create_repository_from_env(
+        "3",
+        {
+            "ETRADE_3_CONSUMER_KEY": "key3",
+            "ETRADE_3_CONSUMER_SECRET": "secret3",
+            "ETRADE_3_LABEL": "Joint",
+        },
+    )
+
+    assert repo.consumer_key == "key3"
+    assert repo.environment == "sandbox"
+    assert repo.profile_label == "Joint"
 
 
 @patch.dict(
@@ -89,8 +112,6 @@ def test_create_repository_from_env_missing_secret() -> None:
 )
 def test_create_repositories_from_env() -> None:
     """Test creating multiple repositories from environment variables."""
-    from repository import create_repositories_from_env
-
     repos = create_repositories_from_env()
 
     assert len(repos) == 2
@@ -114,8 +135,6 @@ def test_create_repositories_from_env() -> None:
 )
 def test_create_repositories_from_env_with_legacy() -> None:
     """Test that legacy ETRADE_* vars work for profile 0."""
-    from repository import create_repositories_from_env
-
     repos = create_repositories_from_env()
 
     assert len(repos) == 1
@@ -127,8 +146,6 @@ def test_create_repositories_from_env_with_legacy() -> None:
 @patch.dict("os.environ", {}, clear=True)
 def test_create_repositories_from_env_no_profiles() -> None:
     """Test error when no profiles are configured."""
-    from repository import create_repositories_from_env
-
     with pytest.raises(ValueError, match="No E\\*TRADE profiles found"):
         create_repositories_from_env()
 
@@ -144,8 +161,6 @@ def test_create_repositories_from_env_no_profiles() -> None:
 )
 def test_create_repositories_from_env_with_gaps() -> None:
     """Test that non-sequential profile IDs are supported."""
-    from repository import create_repositories_from_env
-
     repos = create_repositories_from_env()
 
     # Should get both profiles even with gap
@@ -163,3 +178,13 @@ def test_get_config_dir_no_xdg(monkeypatch: pytest.MonkeyPatch, tmp_path: Path)
     with patch("repository.Path.home", return_value=tmp_path):
         config_dir = ETradeRepository._get_config_dir()
         assert config_dir == tmp_path / ".config" / "etrade-mcp"
+
+
+def test_get_config_dir_creates_directory_once(temp_config_home: Path) -> None:
+    """Test _get_config_dir only calls mkdir the first time for a given path."""
+    with patch("repository.Path.mkdir", autospec=True) as mock_mkdir:
+        first = ETradeRepository._get_config_dir()
+        second = ETradeRepository._get_config_dir()
+
+    assert first == second == temp_config_home / "etrade-mcp"
+    mock_mkdir.assert_called_once_with(first, parents=True, exist_ok=True)
@@ -1,130 +1,164 @@
 """Tests for E*TRADE repository portfolio operations."""
 
 from decimal import Decimal
+from typing import Any
 from unittest.mock import MagicMock
 
+import pytest
+
 from repository import ETradeRepository
 
+# Single dict instead of list for both AccountPortfolio and Position
+DICT_PORTFOLIO_DICT_POSITION_RESPONSE = {
+    "PortfolioResponse": {
+        "AccountPortfolio": {
+            "Position": {
+                "symbolDescription": "APPLE INC COM",
+                "quantity": 10,
+                "marketValue": 1750.00,
+                "Product": {"securityType": "EQ"},
+                "Quick": {"lastTrade": 175.00},
+            }
+        }
+    }
+}
 
-def test_get_account_portfolio_dict_account_portfolios(
-    repository: ETradeRepository, mock_oauth_session: MagicMock
-) -> None:
-    """Test get_account_portfolio when API returns dict for AccountPortfolio."""
-    mock_response = {
-        "PortfolioResponse": {
-            "AccountPortfolio": {  # Single dict instead of list
-                "Position": {  # Single dict instead of list
-                    "symbolDescription": "APPLE INC COM",
+# List of portfolios, but Position is a single dict
+LIST_PORTFOLIO_DICT_POSITION_RESPONSE = {
+    "PortfolioResponse": {
+        "AccountPortfolio": [
+            {
+                "Position": {
+                    "symbolDescription": "MSFT",
+                    "quantity": 5,
+                    "marketValue": 1900.00,
+                    "Product": {"securityType": "EQ"},
+                    "Quick": {"lastTrade": 380.00},
+                }
+            }
+        ]
+    }
+}
+
+# Position is already a list
+LIST_POSITIONS_RESPONSE = {
+    "PortfolioResponse": {
+        "AccountPortfolio": {
+            "Position": [
+                {
+                    "symbolDescription": "AAPL",
                     "quantity": 10,
                     "marketValue": 1750.00,
                     "Product": {"securityType": "EQ"},
                     "Quick": {"lastTrade": 175.00},
-                }
+                },
+                {
+                    "symbolDescription": "MSFT",
+                    "quantity": 5,
+                    "Product": {"securityType": "EQ"},
+                    "Quick": {},
+                    # No marketValue - test branch where market_value is None
+                },
+            ]
+        }
+    }
+}
+
+PORTFOLIO_RESPONSE = {
+    "PortfolioResponse": {
+        "AccountPortfolio": {
+            "Position": {
+                "symbolDescription": "APPLE INC COM",
+                "quantity": 10,
+                "pricePaid": 150.00,
+                "totalCost": 1500.00,
+                "marketValue": 1750.00,
+                "totalGain": 250.00,
+                "Product": {
+                    "securityType": "EQ",
+                },
+                "Quick": {
+                    "lastTrade": 175.00,
+                },
             }
         }
     }
-    mock_oauth_session.get.return_value.json.return_value = mock_response
+}
+
+
+@pytest.mark.parametrize(
+    ("response", "expected_positions", "expected_market_value"),
+    [
+        (DICT_PORTFOLIO_DICT_POSITION_RESPONSE, 1, Decimal("1750.00")),
+        (LIST_PORTFOLIO_DICT_POSITION_RESPONSE, 1, Decimal("1900.00")),
+        # Only AAPL has market value
+        (LIST_POSITIONS_RESPONSE, 2, Decimal("1750.00")),
+    ],
+    ids=[
+        "dict_portfolio_dict_position",
+        "list_portfolio_dict_position",
+        "list_positions",
+    ],
+)
+def test_get_account_portfolio_response_shapes(
+    repository: ETradeRepository,
+    mock_oauth_session: MagicMock,
+    response: dict[str, Any],
+    expected_positions: int,
+    expected_market_value: Decimal,
+) -> None:
+    """Test get_account_portfolio handles E*TRADE's dict-or-list response shapes."""
+    mock_oauth_session.get.return_value.json.return_value = response
 
     portfolio = repository.get_account_portfolio("abc123xyz")
 
     assert portfolio.account_id == "abc123xyz"
-    assert len(portfolio.positions) == 1
+    assert len(portfolio.positions) == expected_positions
+    assert portfolio.total_market_value == expected_market_value
 
 
-def test_get_account_portfolio_list_with_dict_position(
+def test_get_account_portfolio(
     repository: ETradeRepository, mock_oauth_session: MagicMock
 ) -> None:
-    """Test get_account_portfolio when AccountPortfolio is list but Position is dict."""
-    mock_response = {
-        "PortfolioResponse": {
-            "AccountPortfolio": [  # List of portfolios
-                {
-                    "Position": {  # Single dict instead of list
-                        "symbolDescription": "MSFT",
-                        "quantity": 5,
-                        "marketValue": 1900.00,
-                        "Product": {"securityType": "EQ"},
-                        "Quick": {"lastTrade": 380.00},
-                    }
-                }
-            ]
-        }
-    }
-    mock_oauth_session.get.return_value.json.return_value = mock_response
+    """Test getting account portfolio."""
+    mock_oauth_session.get.return_value.json.return_value = PORTFOLIO_RESPONSE
 
     portfolio = repository.get_account_portfolio("abc123xyz")
 
     assert portfolio.account_id == "abc123xyz"
     assert len(portfolio.positions) == 1
+    assert portfolio.positions[0].symbol == "APPLE INC COM"
+    assert portfolio.positions[0].quantity == Decimal("10")
+    assert portfolio.total_market_value == Decimal("1750.00")
 
 
-def test_get_account_portfolio_with_list_positions(
+def test_get_account_portfolio_missing_quantity_is_zero(
     repository: ETradeRepository, mock_oauth_session: MagicMock
 ) -> None:
-    """Test get_account_portfolio when Position is a list (not dict)."""
-    mock_response = {
+    """Test that a position without a quantity is reported as zero shares."""
+    mock_oauth_session.get.return_value.json.return_value = {
         "PortfolioResponse": {
-            "AccountPortfolio": {
-                "Position": [  # Already a list
-                    {
-                        "symbolDescription": "AAPL",
-                        "quantity": 10,
-                        "marketValue": 1750.00,
-                        "Product": {"securityType": "EQ"},
-                        "Quick": {"lastTrade": 175.00},
-                    },
-                    {
-                        "symbolDescription": "MSFT",
-                        "quantity": 5,
-                        "Product": {"securityType": "EQ"},
-                        "Quick": {},
-                        # No marketValue - test branch where market_value is None
-                    },
-                ]
-            }
+            "AccountPortfolio": {"Position": {"symbolDescription": "AAPL"}}
         }
     }
-    mock_oauth_session.get.return_value.json.return_value = mock_response
 
     portfolio = repository.get_account_portfolio("abc123xyz")
 
-    assert portfolio.account_id == "abc123xyz"
-    assert len(portfolio.positions) == 2
-    assert portfolio.total_market_value == Decimal(
-        "1750.00"
-    )  # Only AAPL has market value
+    assert portfolio.positions[0].quantity == Decimal(0)
 
 
-def test_get_account_portfolio(
-    repository: ETradeRepository, mock_oauth_session: MagicMock
+@pytest.mark.parametrize("quantity", ["not_a_number", None], ids=["garbled", "null"])
+def test_get_account_portfolio_invalid_quantity(
+    repository: ETradeRepository, mock_oauth_session: MagicMock, quantity: Any
 ) -> None:
-    """Test getting account portfolio."""
-    mock_response = {
+    """Test that an unparseable position quantity raises instead of becoming zero."""
+    mock_oauth_session.get.return_value.json.return_value = {
         "PortfolioResponse": {
             "AccountPortfolio": {
-                "Position": {
-                    "symbolDescription": "APPLE INC COM",
-                    "quantity": 10,
-                    "pricePaid": 150.00,
-                    "totalCost": 1500.00,
-                    "marketValue": 1750.00,
-                    "totalGain": 250.00,
-                    "Product": {
-                        "securityType": "EQ",
-                    },
-                    "Quick": {
-                        "lastTrade": 175.00,
-                    },
-                }
+                "Position": {"symbolDescription": "AAPL", "quantity": quantity}
             }
         }
     }
-    mock_oauth_session.get.return_value.json.return_value = mock_response
-
-    portfolio = repository.get_account_portfolio("abc123xyz")
 
-    assert portfolio.account_id == "abc123xyz"
-    assert len(portfolio.positions) == 1
-    assert portfolio.positions[0].symbol == "APPLE INC COM"
-    assert portfolio.positions[0].quantity == Decimal("10")
-    assert portfolio.total_market_value == Decimal("1750.00")
+    with pytest.raises(ValueError, match="Invalid quantity for position 'AAPL'"):
+        repository.get_account_portfolio("abc123xyz")
@@ -1,63 +1,72 @@
 """Tests for E*TRADE repository quote operations."""
 
+import threading
+from collections.abc import Callable
 from decimal import Decimal
-from unittest.mock import MagicMock
+from typing import Any
+from unittest.mock import MagicMock, patch
 
 import pytest
+from requests import HTTPError
 
 from repository import ETradeRepository
 
+QUOTE_RESPONSE = {
+    "QuoteResponse": {
+        "QuoteData": {
+            "Product": {
+                "symbol": "AAPL",
+                "companyName": "Apple Inc.",
+                "securityType": "EQ",
+            },
+            "All": {
+                "lastTrade": 175.00,
+                "bid": 174.95,
+                "ask": 175.05,
+                "change": 1.50,
+                "totalVolume": 50_000_000,
+            },
+        }
+    }
+}
+
+MULTIPLE_QUOTES_RESPONSE = {
+    "QuoteResponse": {
+        "QuoteData": [
+            {
+                "Product": {"symbol": "AAPL", "securityType": "EQ"},
+                "All": {"lastTrade": 175.00},
+            },
+            {
+                "Product": {"symbol": "MSFT", "securityType": "EQ"},
+                "All": {"lastTrade": 380.00},
+            },
+        ]
+    }
+}
+
 
 def test_get_quotes(
     repository: ETradeRepository, mock_oauth_session: MagicMock
 ) -> None:
     """Test getting quotes for a single symbol."""
-    mock_response = {
-        "QuoteResponse": {
-            "QuoteData": {
-                "Product": {
-                    "symbol": "AAPL",
-                    "companyName": "Apple Inc.",
-                    "securityType": "EQ",
-                },
-                "All": {
-                    "lastTrade": 175.00,
-                    "bid": 174.95,
-                    "ask": 175.05,
-                    "change": 1.50,
-                    "totalVolume": 50_000_000,
-                },
-            }
-        }
-    }
-    mock_oauth_session.get.return_value.json.return_value = mock_response
+    mock_oauth_session.get.return_value.json.return_value = QUOTE_RESPONSE
 
     quotes = repository.get_quotes(["AAPL"])
 
     assert len(quotes) == 1
     assert quotes[0].symbol == "AAPL"
     assert quotes[0].last_trade == Decimal("175.00")
+    mock_oauth_session.get.return_value.json.assert_called_once_with(
+        parse_float=Decimal
+    )
 
 
 def test_get_quotes_multiple_symbols(
     repository: ETradeRepository, mock_oauth_session: MagicMock
 ) -> None:
     """Test getting quotes for multiple symbols."""
-    mock_response = {
-        "QuoteResponse": {
-            "QuoteData": [
-                {
-                    "Product": {"symbol": "AAPL", "securityType": "EQ"},
-                    "All": {"lastTrade": 175.00},
-                },
-                {
-                    "Product": {"symbol": "MSFT", "securityType": "EQ"},
-                    "All": {"lastTrade": 380.00},
-                },
-            ]
-        }
-    }
-    mock_oauth_session.get.return_value.json.return_value = mock_response
+    mock_oauth_session.get.return_value.json.return_value = MULTIPLE_QUOTES_RESPONSE
 
     quotes = repository.get_quotes(["AAPL", "MSFT"])
 
@@ -66,15 +75,184 @@ def test_get_quotes_multiple_symbols(
     assert quotes[1].symbol == "MSFT"
 
 
-def test_get_quotes_too_many_symbols(repository: ETradeRepository) -> None:
-    """Test that getting quotes fails when too many symbols requested."""
-    symbols = [f"SYM{i}" for i in range(26)]
+def test_get_quotes_batches_more_than_25_symbols(
+    repository: ETradeRepository, mock_oauth_session: MagicMock
+) -> None:
+    """Test that more than 25 symbols are fetched in batches of 25."""
+    symbols = [f"SYM{i}" for i in range(60)]
+
+    def quote_response(url: str, params: dict[str, str] | None = None) -> MagicMock:
+        requested = url.removeprefix(
+            f"{repository.base_url}/v1/market/quote/"
+        ).removesuffix(".json")
+        response = MagicMock()
+        response.json.return_value = {
+            "QuoteResponse": {
+                "QuoteData": [
+                    {"Product": {"symbol": symbol}, "All": {}}
+                    for symbol in requested.split(",")
+                ]
+            }
+        }
+        return response
+
+    mock_oauth_session.get.side_effect = quote_response
 
-    with pytest.raises(ValueError, match="Maximum 25 symbols"):
-        repository.get_quotes(symbols)
+    quotes = repository.get_quotes(symbols)
+
+    assert [quote.symbol for quote in quotes] == symbols
+    requested_batches = sorted(
+        (call.args[0] for call in mock_oauth_session.get.call_args_list),
+        key=len,
+        reverse=True,
+    )
+    assert [url.count(",") + 1 for url in requested_batches] == [25, 25, 10]
 
 
 def test_get_quotes_empty_list(repository: ETradeRepository) -> None:
     """Test getting quotes with empty symbol list."""
     quotes = repository.get_quotes([])
     assert quotes == []
+
+
+def test_get_quotes_reuses_recent_response(
+    repository: ETradeRepository, mock_oauth_session: MagicMock
+) -> None:
+    """Test that repeated quotes within the cache TTL reuse the first response."""
+    mock_oauth_session.get.return_value.json.return_value = {
+        "QuoteResponse": {
+            "QuoteData": {"Product": {"symbol": "AAPL"}, "All": {"lastTrade": 175}}
+        }
+    }
+
+    with patch("repository.time.monotonic", return_value=1000.0):
+        first = repository.get_quotes(["AAPL"])
+    with patch("repository.time.monotonic", return_value=1004.9):
+        second = repository.get_quotes(["AAPL"])
+
+    assert first == second
+    mock_oauth_session.get.assert_called_once()
+
+    with patch("repository.time.monotonic", return_value=1005.0):
+        repository.get_quotes(["AAPL"])
+
+    assert mock_oauth_session.get.call_count == 2
+
+
+def test_get_quotes_expired_responses_are_dropped(
+    repository: ETradeRepository, mock_oauth_session: MagicMock
+) -> None:
+    """Test that caching a new response discards any that have expired."""
+    mock_oauth_session.get.return_value.json.return_value = {"QuoteResponse": {}}
+
+    with patch("repository.time.monotonic", return_value=1000.0):
+        repository.get_quotes(["AAPL"])
+    with patch("repository.time.monotonic", return_value=1010.0):
+        repository.get_quotes(["MSFT"])
+
+    assert list(repository._responses) == ["/v1/market/quote/MSFT.json"]
+
+
+class _LockCheckedResponses(dict[str, tuple[float, dict[str, Any]]]):
+    """Response cache that fails any access made without the repository's lock."""
+
+    def __init__(self, repository: ETradeRepository) -> None:
+        super().__init__()
+        self._lock = repository._responses_lock
+
+    def _check_locked(self) -> None:
+        assert self._lock.locked(), "response cache used without _responses_lock"
+
+    def get(self, *args: Any, **kwargs: Any) -> Any:
+        self._check_locked()
+        return super().get(*args, **kwargs)
+
+    def items(self) -> Any:
+        self._check_locked()
+        return super().items()
+
+    def __setitem__(self, key: str, value: tuple[float, dict[str, Any]]) -> None:
+        self._check_locked()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self._check_locked()
+        super().__delitem__(key)
+
+    def clear(self) -> None:
+        self._check_locked()
+        super().clear()
+
+
+def _batched_quote_responses(
+    repository: ETradeRepository, unauthorized_symbol: str | None = None
+) -> Callable[[str, dict[str, str] | None], MagicMock]:
+    """Answer each quote batch once every batch's request is in flight.
+
+    Holding all three 25/25/10 batches at a barrier makes their cache updates
+    (or a 401 clearing the cache) happen on several threads at the same time.
+    """
+    barrier = threading.Barrier(3, timeout=5)
+
+    def quote_response(url: str, params: dict[str, str] | None = None) -> MagicMock:
+        requested = url.removeprefix(
+            f"{repository.base_url}/v1/market/quote/"
+        ).removesuffix(".json")
+        response = MagicMock()
+        if unauthorized_symbol in requested.split(","):
+            response.status_code = 401
+            response.raise_for_status.side_effect = HTTPError("401 Unauthorized")
+        else:
+            response.status_code = 200
+        response.json.return_value = {
+            "QuoteResponse": {
+                "QuoteData": [
+                    {"Product": {"symbol": symbol}, "All": {}}
+                    for symbol in requested.split(",")
+                ]
+            }
+        }
+        barrier.wait()
+        return response
+
+    return quote_response
+
+
+def test_get_quotes_batches_cache_concurrently_while_entries_expire(
+    repository: ETradeRepository, mock_oauth_session: MagicMock
+) -> None:
+    """Test that concurrent batches all cache their responses and prune safely."""
+    symbols = [f"SYM{i}" for i in range(60)]
+    responses = _LockCheckedResponses(repository)
+    dict.__setitem__(responses, "/v1/market/quote/OLD.json", (999.0, {}))
+    repository._responses = responses
+    mock_oauth_session.get.side_effect = _batched_quote_responses(repository)
+
+    with patch("repository.time.monotonic", return_value=1000.0):
+        quotes = repository.get_quotes(symbols)
+
+    assert [quote.symbol for quote in quotes] == symbols
+    # Every batch's response is kept, in the same dict, and the stale one pruned
+    assert repository._responses is responses
+    assert len(responses) == 3
+    assert "/v1/market/quote/OLD.json" not in responses
+
+
+def test_get_quotes_unauthorized_batch_clears_cache_concurrently(
+    repository: ETradeRepository, mock_oauth_session: MagicMock
+) -> None:
+    """Test that a 401 on one batch clears the cache while others update it."""
+    symbols = [f"SYM{i}" for i in range(60)]
+    responses = _LockCheckedResponses(repository)
+    dict.__setitem__(responses, "/v1/market/quote/OLD.json", (2000.0, {}))
+    repository._responses = responses
+    mock_oauth_session.get.side_effect = _batched_quote_responses(
+        repository, unauthorized_symbol="SYM30"
+    )
+
+    with patch("repository.time.monotonic", return_value=1000.0):
+        with pytest.raises(HTTPError, match="401"):
+            repository.get_quotes(symbols)
+
+    assert repository._responses is responses
+    assert "/v1/market/quote/OLD.json" not in responses
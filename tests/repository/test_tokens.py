@@ -1,15 +1,30 @@
 """Tests for E*TRADE repository token management."""
 
 import json
-from datetime import UTC, datetime, timedelta
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import UTC, datetime, timedelta, tzinfo
 from pathlib import Path
-from unittest.mock import MagicMock
+from typing import Any
+from unittest.mock import MagicMock, patch
 
 import pytest
 
 from repository import ETradeRepository
 
 
+def _freeze_now(monkeypatch: pytest.MonkeyPatch, frozen: datetime) -> None:
+    """Make repository.datetime.now() return a fixed instant."""
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz: tzinfo | None = None) -> "FrozenDatetime":
+            return cls.fromtimestamp(frozen.timestamp(), tz)
+
+    monkeypatch.setattr("repository.datetime", FrozenDatetime)
+
+
 def test_token_persistence(temp_config_home: Path) -> None:
     """Test that tokens are saved and loaded correctly."""
     repo = ETradeRepository(
@@ -26,7 +41,7 @@ def test_token_persistence(temp_config_home: Path) -> None:
     # Verify file exists with correct permissions
     tokens_file = temp_config_home / "etrade-mcp" / "tokens.json"
     assert tokens_file.exists()
-    assert oct(tokens_file.stat().st_mode)[-3:] == "600"
+    assert tokens_file.stat().st_mode & 0o777 == 0o600
 
     # Load tokens back
     result = repo._load_tokens()
@@ -99,8 +114,10 @@ def test_token_renewal(temp_config_home: Path) -> None:
     mock_session.get.assert_called_once_with(repo.RENEW_TOKEN_URL)
 
 
-def test_token_expiration_check() -> None:
+def test_token_expiration_check(monkeypatch: pytest.MonkeyPatch) -> None:
     """Test token expiration checking."""
+    now = datetime(2026, 1, 15, 14, 0, tzinfo=UTC)
+    _freeze_now(monkeypatch, now)
     repo = ETradeRepository(
         consumer_key="test_key",
         consumer_secret="test_secret",
@@ -111,18 +128,31 @@ def test_token_expiration_check() -> None:
     assert repo._is_token_expired()
 
     # Token expires in 1 hour (not expired)
-    repo._token_expires_at = datetime.now(UTC) + timedelta(hours=1)
+    repo._token_expires_at = now + timedelta(hours=1)
     assert not repo._is_token_expired()
 
     # Token expires in 20 minutes (should renew)
-    repo._token_expires_at = datetime.now(UTC) + timedelta(minutes=20)
+    repo._token_expires_at = now + timedelta(minutes=20)
     assert repo._is_token_expired()
 
     # Token expired
-    repo._token_expires_at = datetime.now(UTC) - timedelta(hours=1)
+    repo._token_expires_at = now - timedelta(hours=1)
     assert repo._is_token_expired()
 
 
+def test_token_expiration_check_with_given_time() -> None:
+    """Test that _is_token_expired compares against a caller-supplied time."""
+    repo = ETradeRepository(
+        consumer_key="test_key",
+        consumer_secret="test_secret",
+        environment="sandbox",
+    )
+    repo._token_expires_at = datetime(2026, 1, 15, 5, 0, tzinfo=UTC)
+
+    assert not repo._is_token_expired(datetime(2026, 1, 15, 4, 29, tzinfo=UTC))
+    assert repo._is_token_expired(datetime(2026, 1, 15, 4, 30, tzinfo=UTC))
+
+
 def test_load_tokens_missing_profile(temp_config_home: Path) -> None:
     """Test loading tokens when profile doesn't exist in file."""
     # Create repo with profile 0
@@ -253,3 +283,203 @@ def test_renew_tokens_without_credentials(temp_config_home: Path) -> None:
 
     # Should not raise, just skip saving
     repo._renew_tokens()
+
+
+def test_load_tokens_reuses_parse_until_file_changes(temp_config_home: Path) -> None:
+    """Test that the tokens file is only re-parsed when it changes on disk."""
+    repo = ETradeRepository(
+        consumer_key="test_key",
+        consumer_secret="test_secret",
+        environment="sandbox",
+        profile_id="test",
+    )
+
+    expires_at = datetime.now(UTC) + timedelta(hours=1)
+    repo._save_tokens("test_token", "test_secret", expires_at)
+
+    with patch("repository.json.load", wraps=json.load) as mock_load:
+        # Saving primed the cache, so loading doesn't read the file again
+        assert repo._load_tokens() == ("test_token", "test_secret", expires_at)
+        assert repo._load_tokens() == ("test_token", "test_secret", expires_at)
+        mock_load.assert_not_called()
+
+        # Another process rewrites the file
+        tokens_file = repo._get_tokens_file()
+        all_tokens = json.loads(tokens_file.read_text())
+        all_tokens["test"]["oauth_token"] = "other_token"
+        tokens_file.write_text(json.dumps(all_tokens))
+        stat = tokens_file.stat()
+        os.utime(tokens_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+        assert repo._load_tokens() == ("other_token", "test_secret", expires_at)
+        mock_load.assert_called_once()
+
+
+def test_load_tokens_notices_replacement_with_same_mtime(
+    temp_config_home: Path,
+) -> None:
+    """Test that a replaced tokens file is re-read even if its mtime is unchanged."""
+    repo = ETradeRepository(
+        consumer_key="test_key",
+        consumer_secret="test_secret",
+        environment="sandbox",
+        profile_id="test",
+    )
+    expires_at = datetime.now(UTC) + timedelta(hours=1)
+    repo._save_tokens("test_token", "test_secret", expires_at)
+    tokens_file = repo._get_tokens_file()
+    old_stat = tokens_file.stat()
+
+    # Another process replaces the file within the same timestamp tick
+    all_tokens = json.loads(tokens_file.read_text())
+    all_tokens["test"]["oauth_token"] = "token_two!"
+    replacement = tokens_file.with_name("replacement.json")
+    replacement.write_text(json.dumps(all_tokens, indent=2))
+    os.utime(replacement, ns=(old_stat.st_atime_ns, old_stat.st_mtime_ns))
+    os.replace(replacement, tokens_file)
+    assert tokens_file.stat().st_mtime_ns == old_stat.st_mtime_ns
+
+    assert repo._load_tokens() == ("token_two!", "test_secret", expires_at)
+
+
+def test_save_tokens_notices_replacement_right_after_rename(
+    temp_config_home: Path,
+) -> None:
+    """Test that a file replaced between our rename and the cache update is re-read."""
+    repo = ETradeRepository(
+        consumer_key="test_key",
+        consumer_secret="test_secret",
+        environment="sandbox",
+        profile_id="test",
+    )
+    expires_at = datetime.now(UTC) + timedelta(hours=1)
+    tokens_file = repo._get_tokens_file()
+    replace = os.replace
+
+    def replace_then_overwrite(src: str, dst: Path) -> None:
+        replace(src, dst)
+        # Another process saves its own tokens straight after our rename
+        other = json.loads(dst.read_text())
+        other["test"]["oauth_token"] = "other_token"
+        replacement = dst.with_name("replacement.json")
+        replacement.write_text(json.dumps(other))
+        replace(replacement, dst)
+
+    with patch("repository.os.replace", side_effect=replace_then_overwrite):
+        repo._save_tokens("test_token", "test_secret", expires_at)
+
+    assert json.loads(tokens_file.read_text())["test"]["oauth_token"] == "other_token"
+    assert repo._load_tokens() == ("other_token", "test_secret", expires_at)
+
+
+def test_token_expiry_uses_midnight_eastern_standard_time(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that tokens expire at midnight EST (UTC-5) in winter."""
+    # 10:30pm EST on January 14th
+    _freeze_now(monkeypatch, datetime(2026, 1, 15, 3, 30, tzinfo=UTC))
+
+    expires_at = ETradeRepository._calculate_token_expiry()
+
+    assert expires_at == datetime(2026, 1, 15, 5, 0, tzinfo=UTC)
+
+
+def test_token_expiry_uses_midnight_eastern_daylight_time(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that tokens expire at midnight EDT (UTC-4) in summer."""
+    # 11:30pm EDT on July 14th
+    _freeze_now(monkeypatch, datetime(2026, 7, 15, 3, 30, tzinfo=UTC))
+
+    expires_at = ETradeRepository._calculate_token_expiry()
+
+    assert expires_at == datetime(2026, 7, 15, 4, 0, tzinfo=UTC)
+
+
+def test_token_expiry_uses_inactivity_timeout_before_midnight(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that the 2-hour inactivity timeout wins when midnight is further off."""
+    # 9:00am EST on January 15th
+    _freeze_now(monkeypatch, datetime(2026, 1, 15, 14, 0, tzinfo=UTC))
+
+    expires_at = ETradeRepository._calculate_token_expiry()
+
+    assert expires_at == datetime(2026, 1, 15, 16, 0, tzinfo=UTC)
+
+
+def test_save_tokens_replaces_file_atomically(temp_config_home: Path) -> None:
+    """Test that tokens are written to a temporary file and renamed into place."""
+    repo = ETradeRepository(
+        consumer_key="test_key",
+        consumer_secret="test_secret",
+        environment="sandbox",
+        profile_id="test",
+    )
+    tokens_file = repo._get_tokens_file()
+    tokens_file.write_text("{}")
+    tokens_file.chmod(0o644)
+
+    with patch("repository.os.replace", wraps=os.replace) as mock_replace:
+        repo._save_tokens("test_token", "test_secret", datetime.now(UTC))
+
+    mock_replace.assert_called_once()
+    assert mock_replace.call_args.args[1] == tokens_file
+    assert tokens_file.stat().st_mode & 0o777 == 0o600
+    assert list(tokens_file.parent.iterdir()) == [tokens_file]
+
+
+def test_save_tokens_failure_keeps_existing_file(temp_config_home: Path) -> None:
+    """Test that a failed write leaves the old tokens file and no temp file."""
+    repo = ETradeRepository(
+        consumer_key="test_key",
+        consumer_secret="test_secret",
+        environment="sandbox",
+        profile_id="test",
+    )
+    tokens_file = repo._get_tokens_file()
+    tokens_file.write_text("{}")
+
+    with (
+        patch("repository.json.dump", side_effect=OSError("disk full")),
+        pytest.raises(OSError, match="disk full"),
+    ):
+        repo._save_tokens("test_token", "test_secret", datetime.now(UTC))
+
+    assert tokens_file.read_text() == "{}"
+    assert list(tokens_file.parent.iterdir()) == [tokens_file]
+
+
+def test_concurrent_saves_for_different_profiles_keep_both(
+    temp_config_home: Path,
+) -> None:
+    """Test that saves for two profiles don't drop each other's tokens."""
+    repos = [
+        ETradeRepository(
+            consumer_key="test_key",
+            consumer_secret="test_secret",
+            environment="sandbox",
+            profile_id=profile_id,
+        )
+        for profile_id in ("0", "1")
+    ]
+    barrier = threading.Barrier(len(repos), timeout=5)
+    read_tokens_file = ETradeRepository._read_tokens_file
+
+    def locked_read(tokens_file: Path) -> dict[str, Any]:
+        assert ETradeRepository._tokens_save_lock.locked()
+        return read_tokens_file(tokens_file)
+
+    def save(repo: ETradeRepository) -> None:
+        barrier.wait()
+        repo._save_tokens(f"token_{repo.profile_id}", "secret", datetime.now(UTC))
+
+    with patch.object(ETradeRepository, "_read_tokens_file", side_effect=locked_read):
+        with ThreadPoolExecutor(max_workers=len(repos)) as executor:
+            list(executor.map(save, repos))
+
+    saved = json.loads(repos[0]._get_tokens_file().read_text())
+    assert {p: t["oauth_token"] for p, t in saved.items()} == {
+        "0": "token_0",
+        "1": "token_1",
+    }
@@ -1,6 +1,7 @@
 """Tests for E*TRADE repository utility functions."""
 
 from decimal import Decimal
+from typing import Any
 
 from repository import ETradeRepository
 
@@ -13,3 +14,68 @@ def test_extract_decimal(repository: ETradeRepository) -> None:
     assert repository._extract_decimal(data, "invalid") is None
     assert repository._extract_decimal(data, "none") is None
     assert repository._extract_decimal(data, "missing") is None
+
+
+def test_extract_decimal_reuses_decimal_values(repository: ETradeRepository) -> None:
+    """Test _extract_decimal passes through values already parsed as Decimal."""
+    value = Decimal("1750.00")
+
+    assert repository._extract_decimal({"value": value}, "value") is value
+
+
+def test_extract_decimals(repository: ETradeRepository) -> None:
+    """Test _extract_decimals maps API keys to model fields in one pass."""
+    parsed = Decimal("175.00")
+    data = {"lastTrade": parsed, "bid": 174.95, "ask": "bad", "previousClose": None}
+
+    assert repository._extract_decimals(
+        data,
+        (
+            ("last_trade", "lastTrade"),
+            ("bid", "bid"),
+            ("ask", "ask"),
+            ("close", "previousClose"),
+            ("high", "high"),
+        ),
+    ) == {
+        "last_trade": parsed,
+        "bid": Decimal("174.95"),
+        "ask": None,
+        "close": None,
+        "high": None,
+    }
+
+
+def test_extract_decimal_converts_by_json_type(repository: ETradeRepository) -> None:
+    """Test _extract_decimal converts ints, floats and strings without str()."""
+    data = {
+        "int": 100,
+        "float": 0.1,
+        "string": "12.50",
+        "bool": True,
+        "list": [1],
+    }
+
+    assert repository._extract_decimal(data, "int") == Decimal(100)
+    assert repository._extract_decimal(data, "float") == Decimal("0.1")
+    assert repository._extract_decimal(data, "string") == Decimal("12.50")
+    assert repository._extract_decimal(data, "bool") is None
+    assert repository._extract_decimal(data, "list") is None
+
+
+def test_extract_decimals_looks_up_each_key_once(repository: ETradeRepository) -> None:
+    """Test _extract_decimals converts the value it fetched without a second get."""
+    lookups: list[str] = []
+
+    class CountingDict(dict[str, Any]):
+        def get(self, key: str, default: Any = None) -> Any:
+            lookups.append(key)
+            return super().get(key, default)
+
+    data = CountingDict(bid=174.95, ask="175.05", last=Decimal("175.00"))
+
+    repository._extract_decimals(
+        data, (("bid", "bid"), ("ask", "ask"), ("last_trade", "last"))
+    )
+
+    assert lookups == ["bid", "ask", "last"]
@@ -1,246 +1,235 @@
 """Isolated tests for OAuth web server - testing the real implementation."""
 
-import re
-import time
+import io
+import socket
 import urllib.request
-from http.server import HTTPServer
-from threading import Thread
+from collections.abc import Generator
+from http.client import HTTPMessage
+from threading import Event, Thread
 from unittest.mock import patch
 from urllib.error import HTTPError
-from urllib.parse import urlencode
+from urllib.parse import urlencode, urlsplit
 
 import pytest
 
-from oauth_web_server import OAuthWebHandler, run_web_oauth_flow
+from oauth_web_server import OAuthHTTPServer, OAuthWebHandler, run_web_oauth_flow
 
+# Form bodies for verification code submissions
+CODE_POST = urlencode({"code": "ABC123XYZ"}).encode()
+EMPTY_CODE_POST = urlencode({"code": ""}).encode()
+WHITESPACE_CODE_POST = urlencode({"code": "   "}).encode()
+PADDED_CODE_POST = urlencode({"code": "  CODE123  "}).encode()
+EXTRA_FIELDS_POST = urlencode({"code": "ABC", "a": "1", "b": "2"}).encode()
+FLOW_CODE_POST = urlencode({"code": "VERIFICATION_CODE_123"}).encode()
+FAST_CODE_POST = urlencode({"code": "FAST"}).encode()
 
-def test_oauth_handler_serves_authorization_page(unused_tcp_port: int) -> None:
-    """Test that the handler serves the authorization page with correct content."""
-    # Set up the authorization URL
-    test_auth_url = "https://etrade.com/authorize?token=test123"
-    OAuthWebHandler.authorization_url = test_auth_url
-    OAuthWebHandler.verification_code = None
 
-    with HTTPServer(("localhost", unused_tcp_port), OAuthWebHandler) as server:
-        server_thread = Thread(target=server.serve_forever)
-        server_thread.start()
+@pytest.fixture(scope="module")
+def oauth_server() -> Generator[int, None, None]:
+    """Serve OAuthWebHandler in the background and yield its port.
 
+    The handler keeps its state on the class, so tests set authorization_url
+    and verification_code themselves before making requests.
+    """
+    with OAuthHTTPServer(("127.0.0.1", 0), OAuthWebHandler) as server:
+        server_thread = Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
         try:
-            # Give server time to start
-            time.sleep(0.2)
-
-            # Make GET request
-            with urllib.request.urlopen(
-                f"http://localhost:{unused_tcp_port}/"
-            ) as response:
-                html = response.read().decode()
-                # Verify the HTML contains expected elements
-                assert response.status == 200
-            assert "E*TRADE Authorization" in html
-            assert test_auth_url in html
-            assert "Step 1" in html
-            assert "Step 2" in html
-            assert "Step 3" in html
-            assert 'name="code"' in html
-            assert 'charset="UTF-8"' in html
-
+            yield server.server_address[1]
         finally:
             server.shutdown()
             server_thread.join(timeout=1)
 
 
-def test_oauth_handler_accepts_verification_code(unused_tcp_port: int) -> None:
-    """Test that the handler accepts and stores verification code via POST."""
-    OAuthWebHandler.authorization_url = "https://example.com/auth"
+def test_oauth_handler_serves_authorization_page(oauth_server: int) -> None:
+    """Test that the handler serves the authorization page with correct content."""
+    # Set up the authorization URL
+    test_auth_url = "https://etrade.com/authorize?token=test123"
+    OAuthWebHandler.authorization_url = test_auth_url
     OAuthWebHandler.verification_code = None
 
-    with HTTPServer(("localhost", unused_tcp_port), OAuthWebHandler) as server:
-        server_thread = Thread(target=server.serve_forever)
-        server_thread.start()
-
-        try:
-            time.sleep(0.2)
-
-            # Submit verification code
-            test_code = "ABC123XYZ"
-            post_data = urlencode({"code": test_code}).encode()
-
-            request = urllib.request.Request(
-                f"http://localhost:{unused_tcp_port}/", data=post_data, method="POST"
-            )
-            with urllib.request.urlopen(request) as response:
-                html = response.read().decode()
-                # Verify response
-                assert response.status == 200
-            assert "Authorization Complete" in html
-            assert "✓" in html
-
-            # Verify code was stored
-            assert OAuthWebHandler.verification_code == test_code
-
-        finally:
-            server.shutdown()
-            server_thread.join(timeout=1)
-
+    # Make GET request
+    with urllib.request.urlopen(f"http://127.0.0.1:{oauth_server}/") as response:
+        body = response.read()
+        html = body.decode()
+        # Verify the HTML contains expected elements
+        assert response.status == 200
+        assert response.headers["Content-Length"] == str(len(body))
+        assert response.headers["Content-Type"] == "text/html; charset=utf-8"
+    assert "E*TRADE Authorization" in html
+    assert test_auth_url in html
+    assert "Step 1" in html
+    assert "Step 2" in html
+    assert "Step 3" in html
+    assert 'name="code"' in html
+    assert 'charset="UTF-8"' in html
+
+
+def test_oauth_server_not_blocked_by_idle_connection(oauth_server: int) -> None:
+    """Test that an idle connection doesn't hold up other requests."""
+    OAuthWebHandler.authorization_url = "https://example.com/auth"
 
-def test_oauth_handler_rejects_empty_code(unused_tcp_port: int) -> None:
-    """Test that the handler rejects empty verification code."""
+    # Like a browser's speculative preconnect: connect, but never send a request
+    with socket.create_connection(("127.0.0.1", oauth_server)):
+        with urllib.request.urlopen(
+            f"http://127.0.0.1:{oauth_server}/", timeout=5
+        ) as response:
+            assert response.status == 200
+
+
+@pytest.mark.parametrize(
+    ("post_data", "expected_code"),
+    [(CODE_POST, "ABC123XYZ"), (PADDED_CODE_POST, "CODE123")],
+    ids=["code", "trims_whitespace"],
+)
+def test_oauth_handler_accepts_verification_code(
+    oauth_server: int, post_data: bytes, expected_code: str
+) -> None:
+    """Test that the handler accepts and stores verification code via POST."""
     OAuthWebHandler.authorization_url = "https://example.com/auth"
     OAuthWebHandler.verification_code = None
 
-    with HTTPServer(("localhost", unused_tcp_port), OAuthWebHandler) as server:
-        server_thread = Thread(target=server.serve_forever)
-        server_thread.start()
-
-        try:
-            time.sleep(0.2)
+    # Submit verification code
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{oauth_server}/", data=post_data, method="POST"
+    )
+    with urllib.request.urlopen(request) as response:
+        body = response.read()
+        html = body.decode()
+        # Verify response
+        assert response.status == 200
+        assert response.headers["Content-Length"] == str(len(body))
+        assert response.headers["Connection"] == "close"
+    assert "Authorization Complete" in html
+    assert "✓" in html
+
+    # Verify code was stored, with surrounding whitespace trimmed
+    assert OAuthWebHandler.verification_code == expected_code
+
+
+@pytest.mark.parametrize(
+    "post_data",
+    [EMPTY_CODE_POST, WHITESPACE_CODE_POST, EXTRA_FIELDS_POST],
+    ids=["empty", "whitespace_only", "unexpected_fields"],
+)
+def test_oauth_handler_rejects_invalid_code(
+    oauth_server: int, post_data: bytes
+) -> None:
+    """Test that the handler rejects submissions without a usable code."""
+    OAuthWebHandler.authorization_url = "https://example.com/auth"
+    OAuthWebHandler.verification_code = None
 
-            # Submit empty code
-            post_data = urlencode({"code": ""}).encode()
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{oauth_server}/", data=post_data, method="POST"
+    )
 
-            request = urllib.request.Request(
-                f"http://localhost:{unused_tcp_port}/", data=post_data, method="POST"
-            )
+    # Should get 400 Bad Request
+    with pytest.raises(HTTPError) as exc_info:
+        with urllib.request.urlopen(request) as response:  # pragma: no cover
+            response.read()  # pragma: no cover
 
-            # Should get 400 Bad Request
-            with pytest.raises(HTTPError) as exc_info:
-                with urllib.request.urlopen(request) as response:  # pragma: no cover
-                    response.read()  # pragma: no cover
+    assert exc_info.value.code == 400
+    exc_info.value.close()  # Explicitly close the HTTPError response
 
-            assert exc_info.value.code == 400
-            exc_info.value.close()  # Explicitly close the HTTPError response
+    # Verify code was NOT stored
+    assert OAuthWebHandler.verification_code is None
 
-            # Verify code was NOT stored
-            assert OAuthWebHandler.verification_code is None
 
-        finally:
-            server.shutdown()
-            server_thread.join(timeout=1)
+def _submit_in_background(url: str, post_data: bytes) -> None:
+    """Simulate the user submitting a verification code on the opened page.
 
+    run_web_oauth_flow() only opens the browser once its server is listening,
+    so the code can be posted straight away.
+    """
 
-def test_oauth_handler_rejects_whitespace_only_code(unused_tcp_port: int) -> None:
-    """Test that the handler rejects whitespace-only verification code."""
-    OAuthWebHandler.authorization_url = "https://example.com/auth"
-    OAuthWebHandler.verification_code = None
+    def submit() -> None:
+        request = urllib.request.Request(url, data=post_data, method="POST")
+        with urllib.request.urlopen(request) as response:
+            response.read()  # Ensure response is fully read
 
-    with HTTPServer(("localhost", unused_tcp_port), OAuthWebHandler) as server:
-        server_thread = Thread(target=server.serve_forever)
-        server_thread.start()
+    Thread(target=submit, daemon=True).start()
 
-        try:
-            time.sleep(0.2)
 
-            # Submit whitespace-only code
-            post_data = urlencode({"code": "   "}).encode()
-
-            request = urllib.request.Request(
-                f"http://localhost:{unused_tcp_port}/", data=post_data, method="POST"
-            )
-
-            with pytest.raises(HTTPError) as exc_info:
-                with urllib.request.urlopen(request) as response:  # pragma: no cover
-                    response.read()  # pragma: no cover
+def test_run_web_oauth_flow_integration(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Integration test for the complete web OAuth flow."""
+    auth_url = "https://etrade.com/authorize?token=abc123"
 
-            assert exc_info.value.code == 400
-            exc_info.value.close()  # Explicitly close the HTTPError response
-            assert OAuthWebHandler.verification_code is None
+    # Track if browser was opened
+    browser_opened = []
 
-        finally:
-            server.shutdown()
-            server_thread.join(timeout=1)
+    def mock_browser_open(url: str) -> bool:
+        browser_opened.append(url)
+        _submit_in_background(url, FLOW_CODE_POST)
+        return True
 
+    monkeypatch.setattr("oauth_web_server.webbrowser.open", mock_browser_open)
 
-def test_oauth_handler_trims_whitespace_from_code(unused_tcp_port: int) -> None:
-    """Test that the handler trims whitespace from verification code."""
-    OAuthWebHandler.authorization_url = "https://example.com/auth"
-    OAuthWebHandler.verification_code = None
+    # Run the OAuth flow
+    code = run_web_oauth_flow(auth_url, timeout=5)
 
-    with HTTPServer(("localhost", unused_tcp_port), OAuthWebHandler) as server:
-        server_thread = Thread(target=server.serve_forever)
-        server_thread.start()
+    # Verify we got the code back
+    assert code == "VERIFICATION_CODE_123"
 
-        try:
-            time.sleep(0.2)
+    # Verify browser was opened to the IPv4 loopback address
+    assert len(browser_opened) == 1
+    assert browser_opened[0].startswith("http://127.0.0.1:")
 
-            # Submit code with whitespace
-            post_data = urlencode({"code": "  CODE123  "}).encode()
 
-            request = urllib.request.Request(
-                f"http://localhost:{unused_tcp_port}/", data=post_data, method="POST"
-            )
-            with urllib.request.urlopen(request) as response:
-                html = response.read().decode()
-                assert response.status == 200
-                assert "Authorization Complete" in html
-                # Verify whitespace was trimmed
-                assert OAuthWebHandler.verification_code == "CODE123"
+def test_run_web_oauth_flow_timeout(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that run_web_oauth_flow times out when no code is provided."""
+    auth_url = "https://example.com/auth"
+    waits: list[float | None] = []
 
-        finally:
-            server.shutdown()
-            server_thread.join(timeout=1)
+    class NeverSetEvent(Event):
+        def wait(self, timeout: float | None = None) -> bool:
+            waits.append(timeout)
+            return False
 
+    # Don't open browser, just suppress it
+    monkeypatch.setattr("oauth_web_server.webbrowser.open", lambda url: True)
+    # Report the timeout as soon as the flow starts waiting for the code
+    monkeypatch.setattr("oauth_web_server.Event", NeverSetEvent)
 
-@pytest.mark.filterwarnings("ignore::pytest.PytestUnraisableExceptionWarning")
-def test_run_web_oauth_flow_integration() -> None:
-    """Integration test for the complete web OAuth flow."""
-    auth_url = "https://etrade.com/authorize?token=abc123"
-    test_code = "VERIFICATION_CODE_123"
+    with pytest.raises(TimeoutError, match="timed out after 300 seconds"):
+        run_web_oauth_flow(auth_url, timeout=300)
 
-    # Track if browser was opened
-    browser_opened = []
+    assert waits == [300]
 
-    def mock_browser_open(url: str) -> bool:
-        browser_opened.append(url)
 
-        # Simulate user submitting code after a short delay
-        def submit_code() -> None:  # pragma: no cover
-            time.sleep(0.3)
-            # Extract port from the URL that was opened
-            match = re.search(r":(\d+)", url)
-            if match:  # pragma: no cover
-                port = int(match.group(1))
-                # Submit the verification code
-                post_data = urlencode({"code": test_code}).encode()
-                request = urllib.request.Request(
-                    f"http://localhost:{port}/", data=post_data, method="POST"
-                )
-                with urllib.request.urlopen(request) as response:
-                    response.read()  # Ensure response is fully read
-
-        Thread(target=submit_code).start()
-        return True
+def _post_directly(content_length: str, body: bytes) -> tuple[bytes, int]:
+    """Run do_POST() on a handler wired to in-memory streams instead of a socket.
 
-    with patch(
-        "oauth_web_server.webbrowser.open", autospec=True, side_effect=mock_browser_open
-    ):
-        # Run the OAuth flow
-        code = run_web_oauth_flow(auth_url, timeout=5)
+    Returns the raw response and how many bytes of the body were read.
+    """
+    rfile, wfile = io.BytesIO(body), io.BytesIO()
+    handler = OAuthWebHandler.__new__(OAuthWebHandler)
+    handler.headers = HTTPMessage()
+    handler.headers["Content-Length"] = content_length
+    handler.rfile, handler.wfile = rfile, wfile
+    handler.do_POST()
+    return wfile.getvalue(), rfile.tell()
 
-        # Verify we got the code back
-        assert code == test_code
 
-        # Verify browser was opened to localhost
-        assert len(browser_opened) == 1
-        assert "localhost" in browser_opened[0]
+def test_oauth_handler_rejects_malformed_content_length() -> None:
+    """Test that a non-numeric Content-Length is answered with 400."""
+    OAuthWebHandler.verification_code = None
 
+    response, _ = _post_directly("not-a-number", CODE_POST)
 
-@pytest.mark.filterwarnings("ignore::pytest.PytestUnraisableExceptionWarning")
-def test_run_web_oauth_flow_timeout_real() -> None:
-    """Test that run_web_oauth_flow actually times out when no code is provided."""
-    auth_url = "https://example.com/auth"
+    assert response.startswith(b"HTTP/1.0 400 Bad Request\r\n")
+    assert OAuthWebHandler.verification_code is None
 
-    # Don't open browser, just suppress it
-    with patch("oauth_web_server.webbrowser.open", autospec=True):
-        # Use very short timeout
-        start = time.time()
 
-        with pytest.raises(TimeoutError, match="OAuth authorization timed out"):
-            run_web_oauth_flow(auth_url, timeout=1)
+def test_oauth_handler_bounds_post_body() -> None:
+    """Test that the handler reads no more of the body than it needs."""
+    OAuthWebHandler.verification_code = None
+    body = CODE_POST + b"&" + b"x" * 10_000
 
-        elapsed = time.time() - start
+    response, bytes_read = _post_directly(str(len(body)), body)
 
-        # Verify it actually waited (allow some overhead for thread cleanup)
-        assert 0.4 < elapsed < 1.5
+    assert response.startswith(b"HTTP/1.0 200 OK\r\n")
+    assert OAuthWebHandler.verification_code == "ABC123XYZ"
+    assert bytes_read < len(body)
 
 
 def test_oauth_handler_suppresses_logs(capsys: pytest.CaptureFixture[str]) -> None:
@@ -256,40 +245,35 @@ def test_oauth_handler_suppresses_logs(capsys: pytest.CaptureFixture[str]) -> No
     assert captured.err == ""
 
 
-@pytest.mark.filterwarnings("ignore::pytest.PytestUnraisableExceptionWarning")
-def test_run_web_oauth_flow_finds_random_port() -> None:
+def test_oauth_server_skips_reverse_dns() -> None:
+    """Test that OAuthHTTPServer uses the bound address as its server name."""
+    with patch("socket.getfqdn") as mock_getfqdn:
+        with OAuthHTTPServer(("127.0.0.1", 0), OAuthWebHandler) as server:
+            assert server.server_name == "127.0.0.1"
+            assert server.server_port == server.server_address[1]
+
+    mock_getfqdn.assert_not_called()
+
+
+def test_run_web_oauth_flow_finds_random_port(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
     """Test that run_web_oauth_flow successfully finds an available port."""
     auth_url = "https://example.com/auth"
     ports_used = []
 
-    def track_browser_open(url: str) -> bool:  # pragma: no cover
-        # Extract the port
-        match = re.search(r":(\d+)", url)
-        if match:  # pragma: no cover
-            ports_used.append(int(match.group(1)))
-
-            # Submit code immediately
-            def submit() -> None:
-                time.sleep(0.1)
-                port = ports_used[-1]
-                post_data = urlencode({"code": "FAST"}).encode()
-                request = urllib.request.Request(
-                    f"http://localhost:{port}/", data=post_data, method="POST"
-                )
-                with urllib.request.urlopen(request) as response:
-                    response.read()  # Ensure response is fully read
-
-            Thread(target=submit).start()
+    def track_browser_open(url: str) -> bool:
+        port = urlsplit(url).port
+        assert port is not None
+        ports_used.append(port)
+        _submit_in_background(url, FAST_CODE_POST)
         return True
 
-    with patch(
-        "oauth_web_server.webbrowser.open",
-        autospec=True,
-        side_effect=track_browser_open,
-    ):
-        code = run_web_oauth_flow(auth_url, timeout=2)
-
-        assert code == "FAST"
-        assert len(ports_used) == 1
-        # Port should be in ephemeral range
-        assert 1024 < ports_used[0] < 65535
+    monkeypatch.setattr("oauth_web_server.webbrowser.open", track_browser_open)
+
+    code = run_web_oauth_flow(auth_url, timeout=2)
+
+    assert code == "FAST"
+    assert len(ports_used) == 1
+    # Port should be in ephemeral range
+    assert 1024 < ports_used[0] < 65535
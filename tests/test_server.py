@@ -1,20 +1,23 @@
 """Tests for MCP server tools."""
 
-import json
 import sys
+import threading
 from decimal import Decimal
 from pathlib import Path
+from typing import get_args
 from unittest.mock import MagicMock, patch
 
 import pytest
 from fastmcp.client import Client, FastMCPTransport
+from fastmcp.exceptions import ToolError
 
 # Add parent directory to path to import modules
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import server
-from models import Quote
+from models import Account, BatchOperation, Quote
 from repository import ETradeRepository
+from tests.assertions import extract_response_data
 
 
 async def test_list_accounts(
@@ -23,7 +26,7 @@ async def test_list_accounts(
 ) -> None:
     """Test list_accounts tool."""
     result = await mcp_client.call_tool("list_accounts", arguments={})
-    response_data = json.loads(result.content[0].text)  # type: ignore[union-attr]
+    response_data = extract_response_data(result)
 
     assert len(response_data["accounts"]) == 1
     assert response_data["accounts"][0]["account_id"] == "12345678"
@@ -31,6 +34,26 @@ async def test_list_accounts(
     mock_repository_context.get_accounts.assert_called_once()
 
 
+async def test_tools_call_repository_off_the_event_loop(
+    mock_repository_context: MagicMock,
+    mcp_client: Client[FastMCPTransport],
+    sample_account: Account,
+) -> None:
+    """Test that blocking repository calls run in a worker thread."""
+    calling_threads: list[threading.Thread] = []
+
+    def get_accounts() -> list[Account]:
+        calling_threads.append(threading.current_thread())
+        return [sample_account]
+
+    mock_repository_context.get_accounts.side_effect = get_accounts
+
+    await mcp_client.call_tool("list_accounts", arguments={})
+
+    assert calling_threads
+    assert calling_threads[0] is not threading.current_thread()
+
+
 async def test_get_account_balance(
     mock_repository_context: MagicMock,
     mcp_client: Client[FastMCPTransport],
@@ -39,7 +62,7 @@ async def test_get_account_balance(
     result = await mcp_client.call_tool(
         "get_account_balance", arguments={"account_id_key": "abc123xyz"}
     )
-    response_data = json.loads(result.content[0].text)  # type: ignore[union-attr]
+    response_data = extract_response_data(result)
 
     assert response_data["account_id"] == "12345678"
     assert response_data["cash_balance"] == "5000.00"
@@ -47,6 +70,20 @@ async def test_get_account_balance(
     mock_repository_context.get_account_balance.assert_called_once_with("abc123xyz")
 
 
+async def test_get_all_account_balances(
+    mock_repository_context: MagicMock,
+    mcp_client: Client[FastMCPTransport],
+) -> None:
+    """Test get_all_account_balances tool."""
+    result = await mcp_client.call_tool("get_all_account_balances", arguments={})
+    response_data = extract_response_data(result)
+
+    assert len(response_data["balances"]) == 1
+    assert response_data["balances"][0]["account_id"] == "12345678"
+    assert response_data["balances"][0]["cash_balance"] == "5000.00"
+    mock_repository_context.get_account_balances.assert_called_once_with()
+
+
 async def test_get_account_portfolio(
     mock_repository_context: MagicMock,
     mcp_client: Client[FastMCPTransport],
@@ -55,7 +92,7 @@ async def test_get_account_portfolio(
     result = await mcp_client.call_tool(
         "get_account_portfolio", arguments={"account_id_key": "abc123xyz"}
     )
-    response_data = json.loads(result.content[0].text)  # type: ignore[union-attr]
+    response_data = extract_response_data(result)
 
     assert response_data["account_id"] == "abc123xyz"
     assert len(response_data["positions"]) == 1
@@ -70,7 +107,7 @@ async def test_get_quotes(
 ) -> None:
     """Test get_quotes tool with single symbol."""
     result = await mcp_client.call_tool("get_quotes", arguments={"symbols": ["AAPL"]})
-    response_data = json.loads(result.content[0].text)  # type: ignore[union-attr]
+    response_data = extract_response_data(result)
 
     assert len(response_data["quotes"]) == 1
     assert response_data["quotes"][0]["symbol"] == "AAPL"
@@ -90,22 +127,82 @@ async def test_get_quotes_multiple_symbols(
     result = await mcp_client.call_tool(
         "get_quotes", arguments={"symbols": ["AAPL", "MSFT"]}
     )
-    response_data = json.loads(result.content[0].text)  # type: ignore[union-attr]
+    response_data = extract_response_data(result)
 
     assert len(response_data["quotes"]) == 2
     assert response_data["quotes"][0]["symbol"] == "AAPL"
     assert response_data["quotes"][1]["symbol"] == "MSFT"
 
 
-async def test_get_quotes_too_many_symbols(
+async def test_get_quotes_more_than_25_symbols(
     mock_repository_context: MagicMock,
     mcp_client: Client[FastMCPTransport],
 ) -> None:
-    """Test get_quotes tool rejects > 25 symbols."""
+    """Test get_quotes tool passes > 25 symbols through for batching."""
     symbols = [f"SYM{i}" for i in range(26)]
 
-    with pytest.raises(Exception, match="Maximum 25 symbols"):
-        await mcp_client.call_tool("get_quotes", arguments={"symbols": symbols})
+    await mcp_client.call_tool("get_quotes", arguments={"symbols": symbols})
+
+    mock_repository_context.get_quotes.assert_called_once_with(symbols)
+
+
+async def test_batch_execute(
+    mock_repository_context: MagicMock,
+    mcp_client: Client[FastMCPTransport],
+) -> None:
+    """Test batch_execute runs each operation and reports results in order."""
+    mock_repository_context.get_account_portfolio.side_effect = ValueError(
+        "Account not found: nope"
+    )
+
+    result = await mcp_client.call_tool(
+        "batch_execute",
+        arguments={
+            "operations": [
+                {"tool": "list_accounts"},
+                {"tool": "get_quotes", "arguments": {"symbols": ["AAPL"]}},
+                {"tool": "get_account_portfolio", "arguments": {}},
+                {
+                    "tool": "get_account_portfolio",
+                    "arguments": {"account_id_key": "nope"},
+                },
+            ],
+            "max_concurrent": 2,
+        },
+    )
+    results = extract_response_data(result)["results"]
+
+    assert [r["tool"] for r in results] == [
+        "list_accounts",
+        "get_quotes",
+        "get_account_portfolio",
+        "get_account_portfolio",
+    ]
+    assert results[0]["result"]["accounts"][0]["account_id"] == "12345678"
+    assert results[0]["error"] is None
+    assert results[1]["result"]["quotes"][0]["symbol"] == "AAPL"
+    assert results[2]["result"] is None
+    assert "account_id_key" in results[2]["error"]
+    assert results[3]["error"] == "Account not found: nope"
+    mock_repository_context.get_quotes.assert_called_once_with(["AAPL"])
+
+
+async def test_batch_execute_rejects_unknown_tools(
+    mock_repository_context: MagicMock,
+    mcp_client: Client[FastMCPTransport],
+) -> None:
+    """Test batch_execute only accepts this server's data tools."""
+    with pytest.raises(ToolError, match="'batch_execute' is not one of"):
+        await mcp_client.call_tool(
+            "batch_execute",
+            arguments={"operations": [{"tool": "batch_execute"}]},
+        )
+
+
+def test_batch_tools_match_batch_operation_names() -> None:
+    """Test every tool BatchOperation accepts is wired up in batch_execute."""
+    accepted = get_args(BatchOperation.model_fields["tool"].annotation)
+    assert set(server._BATCH_TOOLS) == set(accepted)
 
 
 @patch("server._repositories", {})
@@ -114,19 +211,13 @@ def test_get_repository_already_authorized(
     mock_create: MagicMock, temp_config_home: Path
 ) -> None:
     """Test get_repository doesn't re-authorize if already authorized."""
-    mock_repo = MagicMock(spec=ETradeRepository)
-    # Set _is_authorized as a direct attribute (not a MagicMock)
-    type(mock_repo)._is_authorized = True
+    mock_repo = MagicMock(spec=ETradeRepository, _is_authorized=True)
     mock_create.return_value = {"0": mock_repo}
 
     repo = server.get_repository()
 
     assert repo._is_authorized
     mock_repo.authorize.assert_not_called()
-    # Reset module state for other tests
-    server._repositories = {}
-    # Clean up the class attribute
-    del type(mock_repo)._is_authorized
 
 
 @patch("server._repositories", {})
@@ -135,18 +226,28 @@ def test_get_repository_needs_authorization(
     mock_create: MagicMock, temp_config_home: Path
 ) -> None:
     """Test get_repository calls authorize if not authorized."""
-    mock_repo = MagicMock(spec=ETradeRepository)
-    # Set _is_authorized as a direct attribute (not a MagicMock)
-    type(mock_repo)._is_authorized = False
+    mock_repo = MagicMock(spec=ETradeRepository, _is_authorized=False)
     mock_create.return_value = {"0": mock_repo}
 
     server.get_repository()
 
     mock_repo.authorize.assert_called_once()
-    # Reset module state for other tests
-    server._repositories = {}
-    # Clean up the class attribute
-    del type(mock_repo)._is_authorized
+
+
+@patch("server._repositories", {})
+@patch("server.create_repositories_from_env")
+def test_get_repository_authorizes_only_requested_profile(
+    mock_create: MagicMock, temp_config_home: Path
+) -> None:
+    """Test get_repository leaves other profiles unauthorized until they're used."""
+    first = MagicMock(spec=ETradeRepository, _is_authorized=False)
+    second = MagicMock(spec=ETradeRepository, _is_authorized=False)
+    mock_create.return_value = {"0": first, "1": second}
+
+    assert server.get_repository(profile_id="1") is second
+
+    second.authorize.assert_called_once()
+    first.authorize.assert_not_called()
 
 
 @patch("server._repositories", {})
@@ -155,14 +256,8 @@ def test_get_repository_invalid_profile(
     mock_create: MagicMock, temp_config_home: Path
 ) -> None:
     """Test get_repository raises error for invalid profile_id."""
-    mock_repo = MagicMock(spec=ETradeRepository)
-    type(mock_repo)._is_authorized = True
+    mock_repo = MagicMock(spec=ETradeRepository, _is_authorized=True)
     mock_create.return_value = {"0": mock_repo}
 
     with pytest.raises(ValueError, match="Profile 999 not found"):
         server.get_repository(profile_id="999")
-
-    # Reset module state for other tests
-    server._repositories = {}
-    # Clean up the class attribute
-    del type(mock_repo)._is_authorized